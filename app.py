@@ -4,6 +4,9 @@ Streamlit app for converting documents into a chatbot using Docling and LangGrap
 
 import os
 import io
+import time
+import uuid
+from pathlib import Path
 import shutil  # ✅ needed for reset_index()
 import streamlit as st
 import pandas as pd
@@ -23,9 +26,16 @@ load_dotenv()
 # Import our modules
 from src.document_processor import DocumentProcessor
 from src.vectorstore import VectorStoreManager
-from src.tools import create_search_tool
+from src.table_store import get_table_store
+from src.tools import create_search_tool, create_table_query_tool
 from src.agent import create_documentation_agent
-from src.structure_visualizer import DocumentStructureVisualizer
+from src.structure_cache import EXPORT_FORMATS, STRUCTURE_DIR_NAME, StructureViews
+from src.model_registry import warm_up
+from src.embedding_cache import get_embedding_cache
+from src.query_cache import get_query_cache
+from src.reranker import CrossEncoderReranker
+from src.checkpointing import get_checkpointer
+from src.metrics import flush_prometheus, record
 
 # Page configuration
 st.set_page_config(
@@ -33,6 +43,23 @@ st.set_page_config(
 )
 
 
+@st.cache_resource(show_spinner="🔧 Loading document models...")
+def warm_models():
+    """Load the Docling (and optionally PaddleOCR) models once per process."""
+    warm_up(force_ocr=os.getenv("WARM_UP_OCR", "0") == "1")
+    return True
+
+
+@st.cache_resource
+def get_reranker():
+    """Shared cross-encoder reranker, enabled with RERANK=1."""
+    if os.getenv("RERANK", "0") != "1":
+        return None
+    return CrossEncoderReranker(
+        latency_budget_ms=float(os.getenv("RERANK_BUDGET_MS", "300")),
+    )
+
+
 def initialize_session_state():
     """Initialize all session state variables."""
     if "uploaded_files" not in st.session_state:
@@ -47,6 +74,12 @@ def initialize_session_state():
         st.session_state.processing_status = "not_started"
     if "docling_docs" not in st.session_state:
         st.session_state.docling_docs = []
+    if "thread_id" not in st.session_state:
+        # One conversation per browser session; kept in the URL so a reload
+        # (or server restart) resumes the checkpointed history
+        thread_id = st.query_params.get("thread") or uuid.uuid4().hex
+        st.query_params["thread"] = thread_id
+        st.session_state.thread_id = thread_id
 
 
 # def process_and_index(uploaded_files):
@@ -93,11 +126,11 @@ def initialize_session_state():
 #         st.session_state.processing_status = "error"
 
 def process_and_index(uploaded_files):
-    """Process uploaded documents and create a fresh in-memory vector store."""
+    """Process uploaded documents and index them (persistent index unless disabled)."""
     try:
         # Step 1: Docling processing
         with st.spinner(f"📄 Processing {len(uploaded_files)} document(s) with Docling..."):
-            processor = DocumentProcessor()
+            processor = DocumentProcessor(table_store=get_table_store())
             documents, docling_docs = processor.process_uploaded_files(uploaded_files)
             st.session_state.docling_docs = docling_docs
 
@@ -110,38 +143,72 @@ def process_and_index(uploaded_files):
             )
             return
 
-        # Step 2: Chunk + create a NEW vectorstore (no loading of existing one)
-        vs_manager = VectorStoreManager()
+        # OCR fallback: only pages that came out (nearly) empty are OCR'd,
+        # and the text is spliced back into the existing Docling documents
+        with st.spinner("🔍 Checking for scanned pages..."):
+            documents, docling_docs = processor.ocr_low_text_pages(documents, docling_docs)
+
+        # Step 2: Chunk + index. With CHROMA_PERSIST_DIR (default chroma_db/) only
+        # new/changed chunks are embedded; set it to "" for a fresh in-memory store.
+        vs_manager = VectorStoreManager(
+            persist_directory=os.getenv("CHROMA_PERSIST_DIR", "chroma_db") or None,
+            embedding_cache=get_embedding_cache(),
+            embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
+            num_threads=int(os.getenv("EMBED_NUM_THREADS", "0")) or None,
+            backend=os.getenv("EMBED_BACKEND", "torch"),
+            chunk_max_tokens=int(os.getenv("CHUNK_MAX_TOKENS", "400")),
+        )
 
         with st.spinner("✂️ Chunking documents..."):
-            chunks = vs_manager.chunk_documents(documents)
-        
-        # Auto–OCR fallback: if chunks are empty, retry with forced OCR
-        if len(chunks) == 0:
-            st.warning("No text chunks found — attempting OCR fallback...")
-
-            # Run DocumentProcessor with Tesseract-based fallback enabled
-            processor = DocumentProcessor(force_ocr=True)
-            documents, docling_docs = processor.process_uploaded_files(uploaded_files)
+            chunks = vs_manager.chunk_documents(documents, docling_docs)
 
-            chunks = vs_manager.chunk_documents(documents)
-
-            if len(chunks) == 0:
-                st.error("OCR fallback failed — no text found. PDF may be a pure image scan.")
-                return
+        if len(chunks) == 0:
+            st.error("OCR fallback failed — no text found. PDF may be a pure image scan.")
+            return
 
         with st.spinner("🔢 Creating vector store (this may take a while for large scanned PDFs)..."):
-            vectorstore = vs_manager.create_vectorstore(chunks)
+            embed_progress = st.progress(0.0, text="🔄 Embedding chunks...")
+
+            def on_embed_progress(done, total):
+                fraction = done / total if total else 1.0
+                embed_progress.progress(fraction, text=f"🔄 Embedded {done}/{total} new chunks")
+
+            # Uploads are keyed by name + content hash; a new version of a file
+            # this session uploaded before replaces that session's old version
+            uploaded_sources = st.session_state.setdefault("uploaded_sources", {})
+            replaced_sources = []
+            for document in documents:
+                previous = uploaded_sources.get(document.metadata["filename"])
+                if previous and previous != document.metadata["source"]:
+                    replaced_sources.append(previous)
+
+            vectorstore = vs_manager.create_vectorstore(
+                chunks,
+                progress_callback=on_embed_progress,
+                replaced_sources=replaced_sources,
+            )
+            embed_progress.empty()
 
-        st.session_state.vectorstore = vectorstore
+            table_store = get_table_store()
+            if table_store is not None:
+                for source in replaced_sources:
+                    table_store.remove_document(source)
+            for document in documents:
+                uploaded_sources[document.metadata["filename"]] = document.metadata["source"]
 
         # Step 3: Create LangGraph agent
         with st.spinner("🤖 Creating agent..."):
-            search_tool = create_search_tool(vectorstore)
-            agent = create_documentation_agent([search_tool])
-            st.session_state.agent = agent
+            index_state = vs_manager.shared_index_state() if vs_manager.persist_directory else None
+            build_agent(
+                vectorstore,
+                vs_manager.keyword_index,
+                vs_manager.index_version,
+                vs_manager.embeddings,
+                index_state=index_state,
+            )
 
         st.session_state.processing_status = "completed"
+        flush_prometheus()
         st.success("✅ Documents indexed! You can now chat with them below.")
 
     except Exception as e:
@@ -154,6 +221,102 @@ def process_and_index(uploaded_files):
         )
         st.session_state.processing_status = "error"
 
+def build_agent(vectorstore, keyword_index, index_version, embeddings, index_state=None):
+    """
+    Create the session's agent over `vectorstore` and store it in session state.
+
+    With a persistent index, `index_state` is shared by all sessions: its
+    version and keyword index are read at search time, and it drops cached
+    results of replaced versions itself.
+    """
+    st.session_state.vectorstore = vectorstore
+
+    # Cached search results / answers for the session's previous in-memory
+    # index are now stale
+    query_cache = get_query_cache()
+    previous_version = st.session_state.get("index_version")
+    if index_state is None and previous_version and previous_version != index_version:
+        query_cache.drop_version(previous_version)
+    st.session_state.index_version = index_version
+    st.session_state.index_state = index_state
+    st.session_state.query_embeddings = embeddings
+
+    search_tool = create_search_tool(
+        vectorstore,
+        keyword_index,
+        token_budget=int(os.getenv("SEARCH_TOKEN_BUDGET", "1500")),
+        query_cache=query_cache,
+        index_version=index_version,
+        reranker=get_reranker(),
+        rerank_candidates=int(os.getenv("RERANK_CANDIDATES", "50")),
+        rerank_top_k=int(os.getenv("RERANK_TOP_K", "3")),
+        index_state=index_state,
+    )
+    tools = [search_tool]
+    table_store = get_table_store()
+    if table_store is not None:
+        tools.append(create_table_query_tool(table_store))
+    st.session_state.agent = create_documentation_agent(
+        tools,
+        checkpointer=get_checkpointer(),
+        history_max_tokens=int(os.getenv("CHAT_HISTORY_TOKENS", "3000")) or None,
+    )
+
+
+def current_index_version():
+    """Version of the index the session searches, as of now."""
+    index_state = st.session_state.get("index_state")
+    if index_state is not None:
+        return index_state.current()[0]
+    return st.session_state.get("index_version")
+
+
+def resume_persistent_index():
+    """
+    Chat over the persistent index straight away, once per session.
+
+    After a restart the documents indexed earlier (and the checkpointed
+    conversations) are still on disk, so nothing needs to be re-uploaded.
+    """
+    if st.session_state.agent is not None or st.session_state.get("resume_attempted"):
+        return
+    st.session_state.resume_attempted = True
+
+    persist_directory = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
+    if not persist_directory or not os.path.isdir(persist_directory):
+        return
+
+    try:
+        with st.spinner("📂 Opening the existing document index..."):
+            vs_manager = VectorStoreManager(
+                persist_directory=persist_directory,
+                embedding_cache=get_embedding_cache(),
+                embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
+                num_threads=int(os.getenv("EMBED_NUM_THREADS", "0")) or None,
+                backend=os.getenv("EMBED_BACKEND", "torch"),
+                chunk_max_tokens=int(os.getenv("CHUNK_MAX_TOKENS", "400")),
+            )
+            vectorstore = vs_manager.load_vectorstore()
+            if not vectorstore.get(include=[])["ids"]:
+                return
+            index_state = vs_manager.shared_index_state()
+            index_version, keyword_index = index_state.current()
+            build_agent(
+                vectorstore,
+                keyword_index,
+                index_version,
+                vs_manager.embeddings,
+                index_state=index_state,
+            )
+        st.session_state.processing_status = "completed"
+        print("✅ Resumed the persistent document index")
+    except Exception:
+        import traceback
+
+        print("=== RESUME INDEX ERROR ===")
+        traceback.print_exc()
+
+
 def render_sidebar():
     """Render the sidebar with setup controls."""
     with st.sidebar:
@@ -217,6 +380,39 @@ def render_sidebar():
             )
 
 
+# Items materialized per page in the Tables / Images views
+TABLES_PER_PAGE = int(os.getenv("TABLES_PER_PAGE", "5"))
+IMAGES_PER_PAGE = int(os.getenv("IMAGES_PER_PAGE", "12"))
+
+
+@st.cache_resource(max_entries=32)
+def get_structure_views(output_dir, version_key, _dl_doc):
+    """Per-document view cache, shared by all reruns and sessions."""
+    return StructureViews(Path(output_dir), _dl_doc)
+
+
+def structure_version_key(output_dir):
+    """Changes whenever the document's structure views are rewritten."""
+    version_file = Path(output_dir) / STRUCTURE_DIR_NAME / "version.json"
+    return version_file.stat().st_mtime_ns if version_file.exists() else 0
+
+
+def paginate(total, per_page, key):
+    """Render a page picker and return the (start, end) slice of the visible page."""
+    num_pages = max(1, -(-total // per_page))
+    if num_pages == 1:
+        return 0, total
+    page = st.number_input(
+        f"Page (1-{num_pages}, {per_page} per page)",
+        min_value=1,
+        max_value=num_pages,
+        value=1,
+        key=key,
+    )
+    start = (page - 1) * per_page
+    return start, min(start + per_page, total)
+
+
 def render_structure_viz():
     """Render document structure visualization."""
     st.title("📊 Document Structure")
@@ -238,16 +434,26 @@ def render_structure_viz():
     if not selected_doc_data:
         return
 
-    # Create visualizer
-    visualizer = DocumentStructureVisualizer(selected_doc_data['doc'])
+    # Views precomputed at ingestion, loaded from disk once per document
+    views = get_structure_views(
+        selected_doc_data['output_dir'],
+        structure_version_key(selected_doc_data['output_dir']),
+        selected_doc_data['doc'],
+    )
 
-    # Display structure in tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📑 Summary", "🏗️ Hierarchy", "📊 Tables", "🖼️ Images"])
+    # Only the selected view is loaded and rendered (st.tabs would run all five)
+    selected_view = st.radio(
+        "View",
+        ["📑 Summary", "🏗️ Hierarchy", "📄 Pages", "📊 Tables", "🖼️ Images"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key=f"structure_view_{selected_doc_name}",
+    )
 
     # ---------- TAB 1: SUMMARY ----------
-    with tab1:
+    if selected_view == "📑 Summary":
         st.subheader("Document Summary")
-        summary = visualizer.get_document_summary()
+        summary = views.summary()
 
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -269,17 +475,69 @@ def render_structure_viz():
         st.dataframe(text_types_df, width="stretch")
 
     # ---------- TAB 2: HIERARCHY ----------
-    with tab2:
+    if selected_view == "🏗️ Hierarchy":
         st.subheader("Document Hierarchy")
-        hierarchy = visualizer.get_document_hierarchy()
+        hierarchy = views.hierarchy()
 
         if hierarchy:
-            for item in hierarchy:
-                indent = "  " * (item["level"] - 1)
-                st.markdown(f"{indent}**{item['text']}** _(Page {item['page']})_")
+            # One nested markdown list, indented by the headings' real levels
+            lines = []
+            stack = [(node, 0) for node in reversed(hierarchy)]
+            while stack:
+                node, depth = stack.pop()
+                lines.append(f"{'    ' * depth}- **{node['text']}** _(Page {node['page']})_")
+                stack.extend((child, depth + 1) for child in reversed(node["children"]))
+            st.markdown("\n".join(lines))
         else:
             st.info("No hierarchical structure detected")
 
+    # ---------- TAB: PAGES ----------
+    if selected_view == "📄 Pages":
+        st.subheader("Pages")
+        pages = views.pages()
+
+        if pages:
+            page_data = st.selectbox(
+                "Page",
+                pages,
+                format_func=lambda p: (
+                    f"Page {p['page']}: {len(p['tables'])} table(s), "
+                    f"{len(p['pictures'])} image(s), {p['num_texts']} text item(s)"
+                ),
+                key=f"structure_page_{selected_doc_name}",
+            )
+
+            for heading in page_data["headings"]:
+                st.markdown(f"**{heading}**")
+
+            tables_by_number = {t["table_number"]: t for t in views.tables()}
+            for table_number in page_data["tables"]:
+                table_data = tables_by_number.get(table_number)
+                st.markdown(f"### Table {table_number}")
+                if table_data and table_data["caption"]:
+                    st.caption(table_data["caption"])
+                df = views.table_frame(table_number)
+                if df is None:
+                    st.info("Table is empty")
+                    continue
+                try:
+                    st.dataframe(df, width="stretch")
+                except ValueError:
+                    st.text(df.to_string())
+
+            if page_data["pictures"]:
+                columns = st.columns(3)
+                for i, picture_number in enumerate(page_data["pictures"]):
+                    with columns[i % 3]:
+                        st.markdown(f"**Image {picture_number}**")
+                        thumbnail = views.thumbnail(picture_number)
+                        if thumbnail is None:
+                            st.info("Image data not available")
+                        else:
+                            st.image(thumbnail)
+        else:
+            st.info("No page information in this document")
+
     # ---------- TAB 3: TABLES (FIXED) ----------
     # with tab3:
     #     st.subheader("Tables")
@@ -349,17 +607,16 @@ def render_structure_viz():
     
     # ---------- TAB 3: TABLES (WITH DOWNLOAD BUTTONS + "ALL TABLES" EXCEL) ----------
 # ---------- TAB 3: TABLES (GROUPED "ALL TABLES" DOWNLOAD ONLY) ----------
-    with tab3:
+    if selected_view == "📊 Tables":
         st.subheader("Tables")
-        tables_info = visualizer.get_tables_info()
+        tables_info = views.tables()
 
         if tables_info:
-            import io
-
-            # For grouped "by type" ALL download
-            schema_groups = {}  # key -> {"columns": [...], "tables": [(table_num, page, df), ...]}
-
-            for table_data in tables_info:
+            # Only the visible page of tables is loaded and rendered
+            start, end = paginate(
+                len(tables_info), TABLES_PER_PAGE, f"tables_page_{selected_doc_name}"
+            )
+            for table_data in tables_info[start:end]:
                 st.markdown(
                     f"### Table {table_data['table_number']} (Page {table_data['page']})"
                 )
@@ -368,48 +625,8 @@ def render_structure_viz():
                     st.caption(table_data["caption"])
 
                 if not table_data["is_empty"]:
-                    df = table_data["dataframe"].copy()
-
-                    # Debug logs
-                    print("=== RAW TABLE COLUMNS ===", list(df.columns))
-
-                    # Reset index so it doesn’t become a column
-                    df = df.reset_index(drop=True)
-
-                    # Clean + deduplicate column names
-                    cleaned_cols = []
-                    seen = {}
-
-                    for idx, col in enumerate(df.columns):
-                        name = str(col).strip()
-
-                        # Replace blank / NaN / None headers
-                        if not name:
-                            name = f"col_{idx+1}"
-
-                        # Ensure uniqueness
-                        if name in seen:
-                            seen[name] += 1
-                            name = f"{name}_{seen[name]}"
-                        else:
-                            seen[name] = 0
-
-                        cleaned_cols.append(name)
-
-                    df.columns = cleaned_cols
-                    print("=== CLEANED COLUMNS ===", cleaned_cols)
-
-                    # --------- GROUPING LOGIC: "type" = same column set ----------
-                    schema_key = tuple(col.lower() for col in cleaned_cols)
-                    if schema_key not in schema_groups:
-                        schema_groups[schema_key] = {
-                            "columns": cleaned_cols,
-                            "tables": [],
-                        }
-
-                    schema_groups[schema_key]["tables"].append(
-                        (table_data["table_number"], table_data["page"], df)
-                    )
+                    # Columns were cleaned + deduplicated at ingestion
+                    df = views.table_frame(table_data["table_number"])
 
                     # Just display the table; user can use the built-in download icon
                     try:
@@ -429,39 +646,38 @@ def render_structure_viz():
 
             # ----------------------------
             # ⭐ Download ALL tables grouped by type (column signature)
+            # Built once per document version on first request, then served from disk
             # ----------------------------
-            if schema_groups:
+            if views.schema_groups():
                 st.subheader("📥 Download ALL tables (grouped by similar columns)")
 
-                grouped_buffer = io.BytesIO()
-                with pd.ExcelWriter(grouped_buffer, engine="xlsxwriter") as writer:
-                    for i, (schema_key, info) in enumerate(schema_groups.items(), start=1):
-                        tables = info["tables"]
-
-                        dfs_with_meta = []
-                        for table_num, page, df in tables:
-                            tmp = df.copy()
-                            # Add metadata so you know where each row came from
-                            tmp.insert(0, "table_number", table_num)
-                            tmp.insert(1, "page", page)
-                            dfs_with_meta.append(tmp)
-
-                        grouped_df = pd.concat(dfs_with_meta, ignore_index=True)
-
-                        # Sheet name: Type_1, Type_2... (Excel limit 31 chars)
-                        sheet_name = f"Type_{i}"
-                        grouped_df.to_excel(
-                            writer,
-                            index=False,
-                            sheet_name=sheet_name[:31],
-                        )
-
-                st.download_button(
-                    label="⬇ Download ALL tables (grouped by similar columns)",
-                    data=grouped_buffer.getvalue(),
-                    file_name=f"{selected_doc_name}_tables_grouped.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                export_format = st.radio(
+                    "Format",
+                    list(EXPORT_FORMATS),
+                    format_func={
+                        "xlsx": "Excel (one sheet per type)",
+                        "csv": "CSV (zip)",
+                        "parquet": "Parquet (zip)",
+                    }.get,
+                    horizontal=True,
+                    key=f"tables_export_format_{selected_doc_name}",
                 )
+                export_path = views.grouped_export_path(export_format)
+
+                if not export_path.exists() and st.button(
+                    "Prepare export", key=f"tables_export_{selected_doc_name}_{export_format}"
+                ):
+                    with st.spinner("Building export..."):
+                        views.grouped_export(export_format)
+
+                if export_path.exists():
+                    with open(export_path, "rb") as export_file:
+                        st.download_button(
+                            label="⬇ Download ALL tables (grouped by similar columns)",
+                            data=export_file,
+                            file_name=export_path.name,
+                            mime=EXPORT_FORMATS[export_format][1],
+                        )
 
         else:
             st.info("No tables found in this document")
@@ -469,37 +685,59 @@ def render_structure_viz():
 
 
     # ---------- TAB 4: IMAGES ----------
-    with tab4:
+    if selected_view == "🖼️ Images":
         st.subheader("Images")
-        pictures_info = visualizer.get_pictures_info()
+        pictures_info = views.pictures()
 
         if pictures_info:
-            for pic_data in pictures_info:
-                st.markdown(
-                    f"**Image {pic_data['picture_number']}** (Page {pic_data['page']})"
-                )
-
-                if pic_data["caption"]:
-                    st.caption(pic_data["caption"])
+            # Only the visible page is materialized, as small cached thumbnails
+            start, end = paginate(
+                len(pictures_info), IMAGES_PER_PAGE, f"images_page_{selected_doc_name}"
+            )
+            columns = st.columns(3)
+            for i, pic_data in enumerate(pictures_info[start:end]):
+                with columns[i % 3]:
+                    st.markdown(
+                        f"**Image {pic_data['picture_number']}** (Page {pic_data['page']})"
+                    )
 
-                if pic_data["pil_image"] is not None:
-                    st.image(pic_data["pil_image"], width="stretch")
-                else:
-                    st.info("Image data not available")
-
-                if pic_data["bounding_box"]:
-                    bbox = pic_data["bounding_box"]
-                    with st.expander("📐 Position Details"):
-                        st.text(
-                            f"Position: ({bbox['left']:.1f}, {bbox['top']:.1f}) "
-                            f"- ({bbox['right']:.1f}, {bbox['bottom']:.1f})"
-                        )
+                    if pic_data["caption"]:
+                        st.caption(pic_data["caption"])
 
-                st.divider()
+                    thumbnail = views.thumbnail(pic_data["picture_number"])
+                    if thumbnail is None:
+                        st.info("Image data not available")
+                    elif st.toggle(
+                        "Full size",
+                        key=f"full_image_{selected_doc_name}_{pic_data['picture_number']}",
+                    ):
+                        st.image(views.full_image(pic_data["picture_number"]), width="stretch")
+                    else:
+                        st.image(thumbnail)
+
+                    if pic_data["bounding_box"]:
+                        bbox = pic_data["bounding_box"]
+                        with st.expander("📐 Position Details"):
+                            st.text(
+                                f"Position: ({bbox['left']:.1f}, {bbox['top']:.1f}) "
+                                f"- ({bbox['right']:.1f}, {bbox['bottom']:.1f})"
+                            )
         else:
             st.info("No images found in this document")
 
 
+def load_chat_history(agent):
+    """User questions and final answers stored for this session's thread."""
+    config = {"configurable": {"thread_id": st.session_state.thread_id}}
+    history = []
+    for message in agent.get_state(config).values.get("messages", []):
+        if isinstance(message, HumanMessage):
+            history.append({"role": "user", "content": message.content})
+        elif isinstance(message, AIMessage) and message.content and not message.tool_calls:
+            history.append({"role": "assistant", "content": message.content})
+    return history
+
+
 def render_chat():
     """Render the chat interface."""
     # Check if agent is ready
@@ -521,6 +759,10 @@ def render_chat():
         )
         return
 
+    # Resumed conversation: show the checkpointed history
+    if not st.session_state.messages:
+        st.session_state.messages = load_chat_history(st.session_state.agent)
+
     # Display chat messages
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -543,13 +785,47 @@ def render_chat():
             message_placeholder = st.empty()
 
             try:
+                # Repeat (or near-identical) questions against the same index
+                # are answered from the shared answer cache; only standalone
+                # questions (the first turn of a conversation) can be, since a
+                # follow-up depends on the turns before it
+                query_cache = get_query_cache()
+                index_version = current_index_version()
+                standalone = len(st.session_state.messages) == 1
+                query_embedding = None
+                cached_answer = None
+                if (
+                    standalone
+                    and index_version
+                    and st.session_state.get("query_embeddings") is not None
+                ):
+                    query_embedding = st.session_state.query_embeddings.embed_query(prompt)
+                    cached_answer = query_cache.get_answer(index_version, prompt, query_embedding)
+
                 # Create config with thread ID for conversation memory
-                config = {"configurable": {"thread_id": "document_chat"}}
+                config = {"configurable": {"thread_id": st.session_state.thread_id}}
+
+                if cached_answer is not None:
+                    # The agent is skipped, so record the turn in the thread
+                    # ourselves; follow-ups and resumed sessions then see it
+                    try:
+                        st.session_state.agent.update_state(
+                            config,
+                            {"messages": [HumanMessage(content=prompt), AIMessage(content=cached_answer)]},
+                            as_node="agent",
+                        )
+                    except Exception as e:
+                        print(f"⚠️ Could not checkpoint cached answer: {e}")
 
                 # Generator function for real-time streaming
                 def generate_response():
                     """Generator that yields tokens from LangGraph stream."""
+                    if cached_answer is not None:
+                        yield cached_answer
+                        return
+
                     status_placeholder.markdown("🤔 **Thinking...**")
+                    started = time.perf_counter()
                     first_content_token = True
                     tool_call_detected = False
                     final_answer_started = False
@@ -585,6 +861,7 @@ def render_chat():
                             if content:
                                 # Update status on first content token
                                 if first_content_token:
+                                    record("llm.time_to_first_token", time.perf_counter() - started)
                                     status_placeholder.markdown(
                                         "💬 **Generating answer...**"
                                     )
@@ -596,12 +873,17 @@ def render_chat():
                                     yield content
 
                     # Clear status when streaming is complete
+                    record("llm.answer", time.perf_counter() - started)
                     status_placeholder.empty()
 
                 # Use st.write_stream for automatic token-by-token display
                 with message_placeholder.container():
                     full_response = st.write_stream(generate_response())
 
+                if cached_answer is None and query_embedding is not None and full_response:
+                    query_cache.put_answer(index_version, prompt, query_embedding, full_response)
+                flush_prometheus()
+
             except Exception as e:
                 import traceback
 
@@ -620,7 +902,9 @@ def render_chat():
 
 def main():
     """Main application function."""
+    warm_models()
     initialize_session_state()
+    resume_persistent_index()
     render_sidebar()
 
     # Create tabs for different views
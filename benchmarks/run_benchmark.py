@@ -0,0 +1,230 @@
+"""
+End-to-end benchmark over the PDFs bundled under outputs/.
+
+The corpus is pinned to the files the labelled questions refer to, so
+documents the app or ingest.py later store under outputs/ do not change it.
+
+Runs DocumentProcessor → VectorStoreManager → search_documents exactly as
+the app does, but in a scratch directory (cold conversion cache, fresh
+index) and without the LLM: the search tool is invoked directly with the
+labelled questions. Reports per-stage latency, pages/s, chunks/s, peak
+RSS and retrieval recall@k, and writes everything to a JSON file that can
+be diffed against an earlier run.
+
+Usage (from the repo root):
+    python benchmarks/run_benchmark.py
+    python benchmarks/run_benchmark.py --baseline benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.document_processor import DocumentProcessor
+from src.metrics import get_metrics
+from src.retrieval import HybridRetriever
+from src.tools import create_search_tool
+from src.vectorstore import VectorStoreManager
+
+
+def _squash(text: str) -> str:
+    """Lowercase and drop whitespace, so OCR-spaced text ("RECOR D") still matches."""
+    return re.sub(r"\s+", "", text.lower())
+
+
+def _peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def is_relevant(doc, label: Dict[str, Any]) -> bool:
+    """A retrieved chunk answers the question if it comes from the labelled
+    source and contains one of the expected phrases."""
+    if doc.metadata.get("source") != label["source"]:
+        return False
+    text = _squash(doc.page_content)
+    return any(_squash(phrase) in text for phrase in label["answer_contains"])
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    questions = json.loads(Path(args.questions).read_text(encoding="utf-8"))
+    sources = sorted({label["source"] for label in questions})
+    corpus = [Path(args.corpus) / Path(source).stem / source for source in sources]
+    missing = [str(path) for path in corpus if not path.is_file()]
+    if missing:
+        raise SystemExit(f"Benchmark corpus files not found: {', '.join(missing)}")
+    ks = sorted(set(args.k))
+
+    registry = get_metrics()
+    registry.reset()
+
+    stages: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="docling-bench-") as scratch:
+        scratch = Path(scratch)
+        print(f"📊 Benchmarking {len(corpus)} PDF(s), {len(questions)} question(s) in {scratch}")
+
+        start = time.perf_counter()
+        processor = DocumentProcessor(
+            num_workers=args.workers, output_root=str(scratch / "outputs")
+        )
+        stages["setup"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        documents, docling_docs = processor.process_paths(corpus)
+        stages["conversion"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        documents, docling_docs = processor.ocr_low_text_pages(documents, docling_docs)
+        stages["ocr_fallback"] = time.perf_counter() - start
+
+        pages = sum(d["doc"].num_pages() for d in docling_docs)
+
+        vs_manager = VectorStoreManager(
+            persist_directory=str(scratch / "chroma_db"),
+            embedding_cache=None,
+            embed_batch_size=args.embed_batch_size,
+            backend=args.embed_backend,
+        )
+
+        start = time.perf_counter()
+        chunks = vs_manager.chunk_documents(documents, docling_docs)
+        stages["chunking"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorstore = vs_manager.create_vectorstore(chunks)
+        stages["indexing"] = time.perf_counter() - start
+
+        # Retrieval quality: rank of the first relevant chunk per question
+        retriever = HybridRetriever(vectorstore, vs_manager.keyword_index)
+        hits = {k: 0 for k in ks}
+        per_question: List[Dict[str, Any]] = []
+        for label in questions:
+            results = retriever.search(label["question"], k=max(ks))
+            rank = next((i + 1 for i, doc in enumerate(results) if is_relevant(doc, label)), None)
+            for k in ks:
+                if rank is not None and rank <= k:
+                    hits[k] += 1
+            per_question.append({"question": label["question"], "first_relevant_rank": rank})
+
+        # Latency of the full search tool (retrieval + packing), no cache
+        search_tool = create_search_tool(vectorstore, vs_manager.keyword_index)
+        latencies: List[float] = []
+        for _ in range(args.search_repeats):
+            for label in questions:
+                start = time.perf_counter()
+                search_tool.invoke(label["question"])
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        stages["search_total"] = sum(latencies)
+
+    conversion_s = stages["conversion"] + stages["ocr_fallback"]
+    index_s = stages["chunking"] + stages["indexing"]
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "workers": args.workers,
+            "embed_batch_size": args.embed_batch_size,
+            "embed_backend": args.embed_backend,
+            "search_repeats": args.search_repeats,
+        },
+        "corpus": {
+            "files": [p.name for p in corpus],
+            "documents": len(documents),
+            "pages": pages,
+            "chunks": len(chunks),
+        },
+        "stages_s": {name: round(seconds, 4) for name, seconds in stages.items()},
+        "throughput": {
+            "pages_per_s": round(pages / conversion_s, 3) if conversion_s else None,
+            "chunks_per_s": round(len(chunks) / index_s, 3) if index_s else None,
+        },
+        "search_latency_ms": {
+            "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "recall_at_k": {str(k): round(hits[k] / len(questions), 3) for k in ks},
+        "per_question": per_question,
+        "peak_rss_mb": _peak_rss_mb(),
+        # Fine-grained spans (Docling per-page stages, embedding batches, ...)
+        "spans": registry.snapshot(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print relative changes of the headline numbers against a previous run."""
+    print(f"\n📈 Compared with {baseline.get('git_commit')} ({baseline.get('timestamp')}):")
+    sections = ["stages_s", "throughput", "search_latency_ms", "recall_at_k", "peak_rss_mb"]
+    for section in sections:
+        for key, value in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(key)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+                continue
+            change = f"{(value - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"   {section}.{key}: {before} → {value} ({change})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(REPO_ROOT / "outputs"), help="Folder with <stem>/<stem>.pdf files")
+    parser.add_argument("--questions", default=str(REPO_ROOT / "benchmarks" / "questions.json"))
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 8], help="Cut-offs for recall@k")
+    parser.add_argument("--workers", type=int, default=1, help="Docling worker processes")
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--embed-backend", default="torch", choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--search-repeats", type=int, default=3, help="Passes over the questions when timing search")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / "benchmarks" / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    print(f"\n✅ Results written to {output}")
+    print(f"   stages (s):   {result['stages_s']}")
+    print(f"   throughput:   {result['throughput']}")
+    print(f"   search (ms):  {result['search_latency_ms']}")
+    print(f"   recall@k:     {result['recall_at_k']}")
+    print(f"   peak RSS (MB):{result['peak_rss_mb']}")
+
+    if args.baseline:
+        compare(result, json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
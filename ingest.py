@@ -0,0 +1,175 @@
+"""
+Headless batch ingestion: convert and index documents from disk.
+
+Usage:
+    python ingest.py /data/bulletins
+    python ingest.py "/data/**/*.pdf" --workers 4 --batch-size 32
+
+Files are read straight from disk (never buffered whole), converted with
+DocumentProcessor on DOCLING_WORKERS processes and upserted into the
+persistent index (CHROMA_PERSIST_DIR). Progress is recorded per file in a
+manifest keyed by content hash, so re-running the same command after an
+interruption resumes where it stopped.
+"""
+
+import argparse
+import glob
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.conversion_cache import hash_file
+from src.document_processor import DocumentProcessor
+from src.embedding_cache import get_embedding_cache
+from src.ingest_manifest import (
+    STATUS_CONVERTED,
+    STATUS_FAILED,
+    STATUS_INDEXED,
+    STATUS_PENDING,
+    IngestManifest,
+)
+from src.metrics import flush_prometheus
+from src.table_store import get_table_store
+from src.vectorstore import VectorStoreManager
+
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".pptx", ".html"}
+
+
+def expand_inputs(inputs: List[str]) -> List[Path]:
+    """Resolve directories (recursively) and glob patterns to supported files."""
+    files: Dict[Path, None] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(Path(item).rglob("*"))
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(item, recursive=True))
+        for path in candidates:
+            if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                files[path.resolve()] = None
+    return list(files)
+
+
+def ingest_batch(
+    batch: List[Path],
+    hashes: Dict[Path, str],
+    processor: DocumentProcessor,
+    vs_manager: VectorStoreManager,
+    manifest: IngestManifest,
+) -> None:
+    """Convert, chunk and index one batch, recording the outcome per file."""
+    for path in batch:
+        manifest.update(hashes[path], STATUS_PENDING, path=str(path))
+
+    start = time.perf_counter()
+    # Full paths as source keys: /a/manual.pdf and /b/manual.pdf get their own
+    # output folders and chunks instead of replacing each other
+    documents, docling_docs = processor.process_paths(
+        batch, sources=[path.as_posix() for path in batch]
+    )
+    documents, docling_docs = processor.ocr_low_text_pages(documents, docling_docs)
+    convert_s = time.perf_counter() - start
+
+    converted = {doc.metadata["content_hash"] for doc in documents}
+    for path in batch:
+        if hashes[path] in converted:
+            manifest.update(hashes[path], STATUS_CONVERTED, timings={"convert_batch_s": convert_s})
+        else:
+            manifest.update(hashes[path], STATUS_FAILED, error="conversion produced no document")
+    manifest.save()
+
+    if not documents:
+        return
+
+    start = time.perf_counter()
+    chunks = vs_manager.chunk_documents(documents, docling_docs)
+    vs_manager.create_vectorstore(chunks)
+    index_s = time.perf_counter() - start
+
+    for content_hash in converted:
+        manifest.update(
+            content_hash,
+            STATUS_INDEXED,
+            timings={"index_batch_s": index_s, "batch_files": len(batch)},
+        )
+    manifest.save()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Directories and/or glob patterns")
+    parser.add_argument("--manifest", default="outputs/ingest_manifest.json", help="Resumable job manifest")
+    parser.add_argument("--batch-size", type=int, default=16, help="Files converted and indexed per batch")
+    parser.add_argument("--workers", type=int, default=None, help="Docling worker processes (default DOCLING_WORKERS)")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that failed in an earlier run")
+    parser.add_argument("--force", action="store_true", help="Re-ingest files the manifest marks as indexed")
+    args = parser.parse_args()
+
+    persist_directory = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
+    if not persist_directory:
+        raise SystemExit("❌ Batch ingestion needs a persistent index (CHROMA_PERSIST_DIR)")
+
+    files = expand_inputs(args.inputs)
+    manifest = IngestManifest(Path(args.manifest))
+
+    # Hash in blocks from disk; unchanged files already indexed are skipped
+    hashes: Dict[Path, str] = {}
+    todo: List[Path] = []
+    seen_hashes = set()
+    for path in files:
+        content_hash = hash_file(path)
+        status = manifest.status(content_hash)
+        if content_hash in seen_hashes:
+            continue
+        seen_hashes.add(content_hash)
+        if status == STATUS_INDEXED and not args.force:
+            continue
+        if status == STATUS_FAILED and not (args.retry_failed or args.force):
+            continue
+        hashes[path] = content_hash
+        todo.append(path)
+
+    print(
+        f"📥 {len(files)} file(s) found, {len(todo)} to ingest "
+        f"({len(files) - len(todo)} already done, duplicates or failed)"
+    )
+    if not todo:
+        return
+
+    processor = DocumentProcessor(num_workers=args.workers, table_store=get_table_store())
+    vs_manager = VectorStoreManager(
+        persist_directory=persist_directory,
+        embedding_cache=get_embedding_cache(),
+        embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
+        num_threads=int(os.getenv("EMBED_NUM_THREADS", "0")) or None,
+        backend=os.getenv("EMBED_BACKEND", "torch"),
+        chunk_max_tokens=int(os.getenv("CHUNK_MAX_TOKENS", "400")),
+    )
+
+    started = time.perf_counter()
+    batch_size = max(1, args.batch_size)
+    for batch_start in range(0, len(todo), batch_size):
+        batch = todo[batch_start:batch_start + batch_size]
+        print(f"\n🚚 Batch {batch_start // batch_size + 1}: files {batch_start + 1}-{batch_start + len(batch)} of {len(todo)}")
+        try:
+            ingest_batch(batch, hashes, processor, vs_manager, manifest)
+        except Exception as e:
+            import traceback
+
+            traceback.print_exc()
+            for path in batch:
+                if manifest.status(hashes[path]) != STATUS_INDEXED:
+                    manifest.update(hashes[path], STATUS_FAILED, error=str(e))
+            manifest.save()
+        flush_prometheus()
+
+    print(f"\n✅ Ingestion finished in {time.perf_counter() - started:.1f}s: {manifest.counts()}")
+
+
+if __name__ == "__main__":
+    main()
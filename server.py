@@ -0,0 +1,266 @@
+"""
+Async HTTP/SSE API for chatting with the indexed documents.
+
+Serves many conversations concurrently from one process: the persistent
+index (CHROMA_PERSIST_DIR), the search tool and the agent are built once
+and shared by every request, and answers are streamed token by token as
+Server-Sent Events.
+
+Run with:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, List, Literal, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+load_dotenv()
+
+from src.agent import create_documentation_agent
+from src.checkpointing import checkpoint_db_path
+from src.embedding_cache import get_embedding_cache
+from src.metrics import get_metrics, record
+from src.query_cache import get_query_cache
+from src.reranker import CrossEncoderReranker
+from src.structure_cache import EXPORT_FORMATS, StructureViews
+from src.table_store import get_table_store
+from src.tools import create_search_tool, create_table_query_tool
+from src.vectorstore import SharedIndexState, VectorStoreManager
+
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class ChatRequest(BaseModel):
+    message: str
+    # Server-side conversation: history is checkpointed under this ID
+    thread_id: Optional[str] = None
+    # Client-side conversation (without thread_id): earlier turns, oldest first
+    history: List[ChatMessage] = []
+
+
+class AgentService:
+    """The shared index + agent, rebuilt on /reload after re-ingestion."""
+
+    def __init__(self):
+        self.vs_manager: Optional[VectorStoreManager] = None
+        self.agent = None
+        self.index_state: Optional[SharedIndexState] = None
+        self.checkpointer = None
+        self.reranker = (
+            CrossEncoderReranker(latency_budget_ms=float(os.getenv("RERANK_BUDGET_MS", "300")))
+            if os.getenv("RERANK", "0") == "1" else None
+        )
+        self._reload_lock = asyncio.Lock()
+
+    def _build(self) -> None:
+        persist_directory = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
+        if not persist_directory:
+            raise RuntimeError("The API server needs a persistent index (CHROMA_PERSIST_DIR)")
+
+        vs_manager = VectorStoreManager(
+            persist_directory=persist_directory,
+            embedding_cache=get_embedding_cache(),
+            embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
+            num_threads=int(os.getenv("EMBED_NUM_THREADS", "0")) or None,
+            backend=os.getenv("EMBED_BACKEND", "torch"),
+        )
+        vectorstore = vs_manager.load_vectorstore()
+        # Version and keyword index are re-read from the shared state on every
+        # search, so re-indexing by the app or ingest.py is picked up (and
+        # stale cache entries dropped) without waiting for /reload
+        index_state = vs_manager.shared_index_state()
+        index_version, keyword_index = index_state.current()
+
+        search_tool = create_search_tool(
+            vectorstore,
+            token_budget=int(os.getenv("SEARCH_TOKEN_BUDGET", "1500")),
+            query_cache=get_query_cache(),
+            reranker=self.reranker,
+            rerank_candidates=int(os.getenv("RERANK_CANDIDATES", "50")),
+            rerank_top_k=int(os.getenv("RERANK_TOP_K", "3")),
+            index_state=index_state,
+        )
+
+        tools = [search_tool]
+        table_store = get_table_store()
+        if table_store is not None:
+            tools.append(create_table_query_tool(table_store))
+
+        # Swap in one go so in-flight requests keep their old agent
+        self.vs_manager = vs_manager
+        self.agent = create_documentation_agent(
+            tools,
+            checkpointer=self.checkpointer,
+            history_max_tokens=int(os.getenv("CHAT_HISTORY_TOKENS", "3000")) or None,
+        )
+        self.index_state = index_state
+        print(f"✅ API index loaded (version {index_version}, {len(keyword_index)} chunks)")
+
+    async def reload(self) -> None:
+        async with self._reload_lock:
+            # Loading models and opening Chroma is blocking work
+            await asyncio.to_thread(self._build)
+
+
+service = AgentService()
+chat_slots = asyncio.Semaphore(int(os.getenv("API_MAX_CONCURRENT_CHATS", "64")))
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    async with AsyncExitStack() as stack:
+        path = checkpoint_db_path()
+        if path is None:
+            from langgraph.checkpoint.memory import MemorySaver
+
+            service.checkpointer = MemorySaver()
+        else:
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            service.checkpointer = await stack.enter_async_context(
+                AsyncSqliteSaver.from_conn_string(path)
+            )
+        await service.reload()
+        yield
+
+
+app = FastAPI(title="Document Intelligence API", lifespan=lifespan)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_answer(request: ChatRequest) -> AsyncIterator[str]:
+    """Yield SSE events for one question: status updates, tokens, then done."""
+    agent = service.agent
+    index_version = service.index_state.current()[0]
+    query_cache = get_query_cache()
+    embeddings = service.vs_manager.embeddings
+
+    async with chat_slots:
+        try:
+            # Only standalone questions can be answered from the shared cache
+            query_embedding = None
+            if not request.history and not request.thread_id:
+                query_embedding = await asyncio.to_thread(embeddings.embed_query, request.message)
+                cached_answer = query_cache.get_answer(index_version, request.message, query_embedding)
+                if cached_answer is not None:
+                    yield _sse("token", {"content": cached_answer})
+                    yield _sse("done", {"cached": True})
+                    return
+
+            if request.thread_id:
+                # Earlier turns come from the checkpoint
+                messages = [HumanMessage(content=request.message)]
+                config = {"configurable": {"thread_id": request.thread_id}}
+            else:
+                messages = [
+                    HumanMessage(content=m.content) if m.role == "user" else AIMessage(content=m.content)
+                    for m in request.history
+                ]
+                messages.append(HumanMessage(content=request.message))
+                # Throwaway thread so client-side history is not mixed with stored ones
+                config = {"configurable": {"thread_id": f"stateless-{uuid.uuid4().hex}"}}
+
+            yield _sse("status", {"status": "thinking"})
+            started = time.perf_counter()
+            tool_call_detected = False
+            answer_parts: List[str] = []
+
+            async for msg, metadata in agent.astream(
+                {"messages": messages},
+                config=config,
+                stream_mode="messages",
+            ):
+                langgraph_node = metadata.get("langgraph_node", "").lower()
+
+                # Tool output is search context, not answer tokens
+                if "tool" in langgraph_node:
+                    if not tool_call_detected:
+                        yield _sse("status", {"status": "searching"})
+                        tool_call_detected = True
+                    continue
+
+                if "agent" in langgraph_node and getattr(msg, "content", None):
+                    if not answer_parts:
+                        record("llm.time_to_first_token", time.perf_counter() - started)
+                    answer_parts.append(msg.content)
+                    yield _sse("token", {"content": msg.content})
+
+            if not request.thread_id and hasattr(agent.checkpointer, "adelete_thread"):
+                await agent.checkpointer.adelete_thread(config["configurable"]["thread_id"])
+
+            record("llm.answer", time.perf_counter() - started)
+            answer = "".join(answer_parts)
+            if query_embedding is not None and answer:
+                query_cache.put_answer(index_version, request.message, query_embedding, answer)
+            yield _sse("done", {"cached": False})
+
+        except Exception as e:
+            import traceback
+
+            print(f"API chat error: {traceback.format_exc()}")
+            yield _sse("error", {"error": str(e)})
+
+
+@app.get("/health")
+async def health():
+    index_version = service.index_state.current()[0] if service.index_state else None
+    return {"status": "ok", "index_version": index_version}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline timings in the Prometheus text format."""
+    return get_metrics().export_prometheus()
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    """Stream the agent's answer as Server-Sent Events."""
+    if service.agent is None:
+        raise HTTPException(status_code=503, detail="Index not loaded yet")
+    return StreamingResponse(
+        _stream_answer(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/reload")
+async def reload_index():
+    """Re-open the persistent index after documents were (re-)indexed elsewhere."""
+    await service.reload()
+    return {"status": "reloaded", "index_version": service.index_state.current()[0]}
+
+
+@app.get("/documents/{name}/tables/export")
+async def export_tables(name: str, format: Literal["xlsx", "csv", "parquet"] = "xlsx"):
+    """Download a document's tables grouped by similar columns (built on first request)."""
+    doc_dir = Path("outputs") / name
+    if Path(name).name != name or not doc_dir.is_dir():
+        raise HTTPException(status_code=404, detail="Unknown document")
+    try:
+        path = await asyncio.to_thread(StructureViews(doc_dir).grouped_export, format)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Document has no structure views")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Document has no tables")
+    # Streamed from disk in chunks
+    return FileResponse(path, media_type=EXPORT_FORMATS[format][1], filename=path.name)
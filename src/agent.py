@@ -21,27 +21,88 @@ When answering:
 4. Only search again if absolutely necessary
 """
 
-from typing import List
+# Added to the guidelines when the agent has the query_tables tool
+QUERY_TABLES_GUIDELINE = (
+    "- For numbers and other values held in tables (part numbers, torque values, test equipment settings...), "
+    "use the query_tables tool; it looks them up across all documents at once\n"
+)
+
+from typing import Any, Callable, Dict, List, Optional
+import json
 import os
 
-from langchain_openai import ChatOpenAI
+import tiktoken
 from langgraph.prebuilt import create_react_agent
+from langchain_core.messages import BaseMessage, trim_messages
 from langchain_core.tools import BaseTool
 
+from src.llm_client import get_chat_model
+
+
+def make_history_trimmer(max_tokens: int, encoding_name: str = "cl100k_base") -> Callable:
+    """
+    Build a pre-model hook that sends only the most recent `max_tokens` of
+    conversation to the LLM. The full history stays in the checkpoint.
+    """
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def count_tokens(messages: List[BaseMessage]) -> int:
+        total = 0
+        for message in messages:
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+            total += len(encoding.encode(content, disallowed_special=())) + 4
+            tool_calls = getattr(message, "tool_calls", None)
+            if tool_calls:
+                total += len(encoding.encode(json.dumps(tool_calls, default=str), disallowed_special=()))
+        return total
+
+    def trim_history(state: Dict[str, Any]) -> Dict[str, Any]:
+        trimmed = trim_messages(
+            state["messages"],
+            strategy="last",
+            token_counter=count_tokens,
+            max_tokens=max_tokens,
+            # Never open the window on an orphaned tool call/result
+            start_on="human",
+            include_system=True,
+            allow_partial=False,
+        )
+        if not trimmed:
+            # The current turn alone is over budget: still send all of it
+            messages = state["messages"]
+            last_human = max(
+                (i for i, m in enumerate(messages) if m.type == "human"), default=0
+            )
+            trimmed = messages[last_human:]
+        return {"llm_input_messages": trimmed}
+
+    return trim_history
+
 
 def create_documentation_agent(
     tools: List[BaseTool],
     model_name: str = "openai/gpt-4.1-mini",   
+    checkpointer: Optional[Any] = None,
+    history_max_tokens: Optional[int] = None,
 ):
     """
     Create a document QA agent using OpenRouter + LangGraph REACT agent.
+
+    The chat model (and its pooled connections) is shared by every agent
+    built in this process for the same model and base URL.
+
+    Args:
+        tools: Tools available to the agent
+        model_name: Model id on the LLM backend
+        checkpointer: LangGraph checkpointer persisting history per thread_id
+        history_max_tokens: Conversation window sent to the LLM each turn
+            (None = the whole history)
     """
 
-    llm = ChatOpenAI(
-        model=model_name,
+    llm = get_chat_model(
+        model_name,
         temperature=0,
         api_key=os.getenv("OPENROUTER_API_KEY"),
-        base_url="https://openrouter.ai/api/v1",
         extra_body={
             "provider": {
                 "zdr": True  
@@ -49,9 +110,17 @@ def create_documentation_agent(
         },
     )
 
+    prompt = SYSTEM_PROMPT
+    if any(t.name == "query_tables" for t in tools):
+        search_line = "- Use the search_documents tool to find relevant information\n"
+        prompt = prompt.replace(search_line, search_line + QUERY_TABLES_GUIDELINE)
+
     agent = create_react_agent(
         model=llm,
-        tools=tools
+        tools=tools,
+        prompt=prompt,
+        checkpointer=checkpointer,
+        pre_model_hook=make_history_trimmer(history_max_tokens) if history_max_tokens else None,
     )
 
     return agent
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Conversation persistence for the LangGraph agent.
+
+Each chat session gets its own thread ID; the agent's message history per
+thread is checkpointed to a local SQLite file so conversations survive
+restarts. Set CHECKPOINT_DB to an empty value to keep history in memory only.
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+
+DEFAULT_CHECKPOINT_DB = "checkpoints/chat.sqlite"
+
+_lock = threading.Lock()
+_checkpointer: Optional[Any] = None
+
+
+def checkpoint_db_path() -> Optional[str]:
+    """Configured checkpoint database, or None for in-memory history."""
+    return os.getenv("CHECKPOINT_DB", DEFAULT_CHECKPOINT_DB) or None
+
+
+def get_checkpointer() -> Any:
+    """Return the process-wide (synchronous) checkpointer."""
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None:
+            path = checkpoint_db_path()
+            if path is None:
+                _checkpointer = MemorySaver()
+            else:
+                from langgraph.checkpoint.sqlite import SqliteSaver
+
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                # Shared by every Streamlit session thread
+                conn = sqlite3.connect(path, check_same_thread=False)
+                _checkpointer = SqliteSaver(conn)
+                print(f"💾 Chat history checkpointed to {path}")
+    return _checkpointer
@@ -0,0 +1,170 @@
+"""
+Structure-aware chunking driven by the DoclingDocument tree.
+
+Instead of splitting the flat markdown export, this walks the document
+items in reading order and cuts chunks at section boundaries and at a token
+budget. Each chunk carries its heading path and page numbers, and tables
+are always emitted as a single chunk.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+import tiktoken
+from docling_core.types.doc import DocItemLabel, TableItem, TextItem
+from langchain_core.documents import Document
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_HEADING_LABELS = {DocItemLabel.TITLE, DocItemLabel.SECTION_HEADER}
+
+
+class StructureChunker:
+    """Emits section- and token-bounded chunks from a DoclingDocument."""
+
+    def __init__(self, max_tokens: int = 400, encoding_name: str = "cl100k_base"):
+        """
+        Args:
+            max_tokens: Token budget per text chunk (tables may exceed it)
+            encoding_name: tiktoken encoding used for counting
+        """
+        self.max_tokens = max_tokens
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _split_long_text(self, text: str) -> List[str]:
+        """Split one oversized paragraph on sentences, then on raw tokens."""
+        pieces: List[str] = []
+        current = ""
+        for sentence in _SENTENCE_SPLIT.split(text):
+            candidate = f"{current} {sentence}".strip()
+            if self._count(candidate) <= self.max_tokens:
+                current = candidate
+                continue
+            if current:
+                pieces.append(current)
+            if self._count(sentence) <= self.max_tokens:
+                current = sentence
+            else:
+                tokens = self.encoding.encode(sentence, disallowed_special=())
+                for start in range(0, len(tokens), self.max_tokens):
+                    pieces.append(self.encoding.decode(tokens[start:start + self.max_tokens]))
+                current = ""
+        if current:
+            pieces.append(current)
+        return pieces
+
+    @staticmethod
+    def _pages(item: Any) -> List[int]:
+        return [prov.page_no for prov in getattr(item, "prov", [])]
+
+    @staticmethod
+    def _make_chunk(
+        parts: List[str],
+        pages: List[int],
+        heading_path: List[str],
+        chunk_type: str,
+        base_metadata: Dict[str, Any],
+    ) -> Document:
+        breadcrumb = " > ".join(heading_path)
+        body = "\n\n".join(parts)
+        content = f"{breadcrumb}\n\n{body}" if breadcrumb else body
+
+        unique_pages = sorted(set(pages))
+        metadata = dict(base_metadata)
+        metadata.update({
+            "heading_path": breadcrumb,
+            "pages": ",".join(str(p) for p in unique_pages),
+            "page": unique_pages[0] if unique_pages else 0,
+            "chunk_type": chunk_type,
+        })
+        return Document(page_content=content, metadata=metadata)
+
+    def chunk(self, dl_doc: Any, base_metadata: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Chunk one DoclingDocument.
+
+        Args:
+            dl_doc: The DoclingDocument to chunk
+            base_metadata: Metadata copied onto every chunk (filename, source, ...)
+
+        Returns:
+            List of LangChain Documents in reading order
+        """
+        base_metadata = base_metadata or {}
+        chunks: List[Document] = []
+
+        # (level, text) of the headings above the current position
+        heading_stack: List[tuple] = []
+        parts: List[str] = []
+        part_pages: List[int] = []
+        part_tokens = 0
+
+        def heading_path() -> List[str]:
+            return [text for _, text in heading_stack]
+
+        def flush() -> None:
+            nonlocal parts, part_pages, part_tokens
+            if parts:
+                chunks.append(
+                    self._make_chunk(parts, part_pages, heading_path(), "text", base_metadata)
+                )
+            parts, part_pages, part_tokens = [], [], 0
+
+        for item, _level in dl_doc.iterate_items():
+            if isinstance(item, TableItem):
+                flush()
+                try:
+                    table_md = item.export_to_markdown(doc=dl_doc)
+                except Exception as e:
+                    print(f"⚠️ Could not export table for chunking: {e}")
+                    continue
+                if table_md.strip():
+                    caption = item.caption_text(dl_doc) if item.captions else ""
+                    table_parts = [caption, table_md] if caption else [table_md]
+                    chunks.append(
+                        self._make_chunk(
+                            table_parts, self._pages(item), heading_path(), "table", base_metadata
+                        )
+                    )
+                continue
+
+            if not isinstance(item, TextItem):
+                continue
+
+            text = (item.text or "").strip()
+            if not text:
+                continue
+
+            if item.label in _HEADING_LABELS:
+                # A new section always starts a new chunk
+                flush()
+                level = 0 if item.label == DocItemLabel.TITLE else getattr(item, "level", 1)
+                while heading_stack and heading_stack[-1][0] >= level:
+                    heading_stack.pop()
+                heading_stack.append((level, text))
+                continue
+
+            if item.label == DocItemLabel.LIST_ITEM:
+                text = f"- {text}"
+
+            tokens = self._count(text)
+            pages = self._pages(item)
+
+            if tokens > self.max_tokens:
+                flush()
+                for piece in self._split_long_text(text):
+                    chunks.append(
+                        self._make_chunk([piece], pages, heading_path(), "text", base_metadata)
+                    )
+                continue
+
+            if part_tokens + tokens > self.max_tokens:
+                flush()
+            parts.append(text)
+            part_pages.extend(pages)
+            part_tokens += tokens
+
+        flush()
+        return chunks
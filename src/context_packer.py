@@ -0,0 +1,206 @@
+"""
+Token-budgeted packing of retrieved chunks into the search tool's answer.
+"""
+import re
+from typing import List, Set, Tuple
+
+import tiktoken
+from langchain_core.documents import Document
+
+from src.keyword_index import tokenize
+
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Query words too common to say anything about which sentence is relevant
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "of", "on", "or", "the", "this", "to",
+    "what", "when", "where", "which", "who", "why", "with",
+}
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def _is_table_row(line: str) -> bool:
+    return line.lstrip().startswith("|")
+
+
+def _split_units(content: str) -> List[str]:
+    """
+    Split a text chunk into sentences, keeping each markdown table (a run
+    of lines starting with "|") together as one unit.
+    """
+    units: List[str] = []
+    table: List[str] = []
+    text: List[str] = []
+
+    def flush_text() -> None:
+        units.extend(s.strip() for s in _SENTENCE_SPLIT.split("\n".join(text)) if s.strip())
+        text.clear()
+
+    for line in content.splitlines():
+        if _is_table_row(line):
+            flush_text()
+            table.append(line.strip())
+        else:
+            if table:
+                units.append("\n".join(table))
+                table = []
+            text.append(line)
+    if table:
+        units.append("\n".join(table))
+    flush_text()
+    return units
+
+
+def _join_units(units: List[str]) -> str:
+    """Sentences are joined with spaces; tables keep their own lines."""
+    text = ""
+    for unit in units:
+        if not text:
+            text = unit
+        elif _is_table_row(unit) or _is_table_row(text.rsplit("\n", 1)[-1]):
+            text += "\n" + unit
+        else:
+            text += " " + unit
+    return text
+
+
+class ContextPacker:
+    """
+    Turns ranked chunks into a compact context string under a token budget.
+
+    - sentences already emitted (e.g. from the 200-char splitter overlap, or
+      the same passage retrieved twice) are dropped
+    - text chunks are trimmed to the sentences that match the query, plus one
+      sentence of context on each side; markdown tables inside them count as
+      a single sentence, so rows are never dropped from a table
+    - chunks are added in rank order until the budget is spent
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        encoding_name: str = "cl100k_base",
+        context_sentences: int = 1,
+        fallback_sentences: int = 3,
+    ):
+        """
+        Args:
+            token_budget: Max tokens for the whole packed context
+            encoding_name: tiktoken encoding used for counting
+            context_sentences: Neighbouring sentences kept around each match
+            fallback_sentences: Leading sentences kept when nothing matches
+        """
+        self.token_budget = token_budget
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.context_sentences = context_sentences
+        self.fallback_sentences = fallback_sentences
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _select_sentences(
+        self, sentences: List[str], query_terms: Set[str]
+    ) -> Tuple[List[int], Set[int]]:
+        """
+        Pick the sentences to keep for one chunk.
+
+        Returns:
+            (indices to keep in order, indices that matched the query)
+        """
+        matched = {
+            i for i, sentence in enumerate(sentences)
+            if query_terms & set(tokenize(sentence))
+        }
+        if not matched:
+            return list(range(min(self.fallback_sentences, len(sentences)))), matched
+
+        keep: Set[int] = set()
+        for i in matched:
+            lo = max(0, i - self.context_sentences)
+            hi = min(len(sentences), i + self.context_sentences + 1)
+            keep.update(range(lo, hi))
+        return sorted(keep), matched
+
+    @staticmethod
+    def _source_label(index: int, doc: Document) -> str:
+        source = doc.metadata.get("filename", doc.metadata.get("source", "Unknown source"))
+        pages = doc.metadata.get("pages")
+        if pages:
+            return f"[Source {index}: {source}, page(s) {pages}]"
+        return f"[Source {index}: {source}]"
+
+    @staticmethod
+    def _format_part(label: str, text: str) -> str:
+        # A markdown table must start on its own line
+        separator = "\n" if _is_table_row(text) else " "
+        return f"{label}\nContent:{separator}{text}\n"
+
+    def pack(self, query: str, docs: List[Document]) -> str:
+        """
+        Build the context string for `query` from ranked `docs`.
+
+        Text chunks whose sentences no longer fit are trimmed; tables that do
+        not fit are skipped whole.
+
+        Returns:
+            Formatted context, or an empty string if nothing fits
+        """
+        query_terms = set(tokenize(query)) - _STOPWORDS
+        seen_sentences: Set[str] = set()
+        parts: List[str] = []
+        used_tokens = 0
+
+        for doc in docs:
+            content = (doc.page_content or "").strip()
+            if not content:
+                continue
+
+            is_table = doc.metadata.get("chunk_type") == "table"
+            if is_table:
+                # Tables stay atomic: either the whole table fits or it is skipped
+                selected = [content]
+                if _normalize(content) in seen_sentences:
+                    continue
+                selected_text = content
+            else:
+                sentences = _split_units(content)
+                fresh = [s for s in sentences if _normalize(s) not in seen_sentences]
+                if not fresh:
+                    continue
+                keep, matched = self._select_sentences(fresh, query_terms)
+                selected = [fresh[i] for i in keep]
+                selected_text = _join_units(selected)
+
+            label = self._source_label(len(parts) + 1, doc)
+            part = self._format_part(label, selected_text)
+            part_tokens = self._count(part)
+
+            if used_tokens + part_tokens > self.token_budget:
+                if is_table:
+                    continue
+                # Trim until it fits: context sentences go first, matches last
+                drop_order = [i for i in reversed(keep) if i not in matched]
+                drop_order += [i for i in reversed(keep) if i in matched]
+                kept = list(keep)
+                while kept and used_tokens + part_tokens > self.token_budget:
+                    kept.remove(drop_order.pop(0))
+                    selected = [fresh[i] for i in kept]
+                    selected_text = _join_units(selected)
+                    part = self._format_part(label, selected_text)
+                    part_tokens = self._count(part)
+                if not selected:
+                    continue
+
+            seen_sentences.update(_normalize(s) for s in selected)
+            parts.append(part)
+            used_tokens += part_tokens
+
+            if used_tokens >= self.token_budget:
+                break
+
+        return "\n---\n".join(parts)
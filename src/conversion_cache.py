@@ -0,0 +1,139 @@
+"""
+Content-addressed cache for Docling conversions.
+"""
+import hashlib
+import json
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from docling_core.types.doc import DoclingDocument
+
+
+CACHE_INDEX_NAME = "conversion_cache.json"
+# Written into each output folder: which cache key its outputs belong to
+CACHE_MARKER_NAME = "conversion_key.json"
+
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw file bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_options(pipeline_options: Any) -> str:
+    """
+    Return a stable fingerprint of the Docling pipeline options.
+
+    Two conversions only share a cache entry when they ran with the same
+    options (OCR on/off, image scale, table structure, ...) and the same
+    docling / docling-core versions, so an upgrade re-converts documents.
+    """
+    try:
+        payload = pipeline_options.model_dump_json()
+    except Exception:
+        payload = repr(pipeline_options)
+    payload += f"|docling={_package_version('docling')}|docling-core={_package_version('docling-core')}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ConversionCache:
+    """Maps (file hash, pipeline options) to a previously converted output folder."""
+
+    def __init__(self, output_root: Path):
+        """
+        Args:
+            output_root: Root folder holding the per-document output folders
+        """
+        self.index_path = Path(output_root) / CACHE_INDEX_NAME
+        self._index: Dict[str, Dict[str, str]] = self._load_index()
+
+    @staticmethod
+    def make_key(content_hash: str, options_fingerprint: str) -> str:
+        """Build the cache key for one file under one set of pipeline options."""
+        return f"{content_hash}-{options_fingerprint[:16]}"
+
+    def _load_index(self) -> Dict[str, Dict[str, str]]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Conversion cache index is unreadable, starting fresh: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._index, indent=2), encoding="utf-8")
+        tmp_path.replace(self.index_path)
+
+    def lookup(self, key: str) -> Optional[Tuple[DoclingDocument, str, Path]]:
+        """
+        Reload a cached conversion.
+
+        Returns:
+            (DoclingDocument, markdown, output folder) on a hit, otherwise None
+        """
+        entry = self._index.get(key)
+        if not entry:
+            return None
+
+        doc_dir = Path(entry["doc_dir"])
+        json_path = doc_dir / "document.json"
+        md_path = doc_dir / "document.md"
+        if (
+            not json_path.exists()
+            or not md_path.exists()
+            or self._folder_key(doc_dir) != key
+        ):
+            # Outputs were deleted (e.g. index reset) or overwritten by another
+            # file with the same name → drop the stale entry
+            self._index.pop(key, None)
+            self._save_index()
+            return None
+
+        try:
+            dl_doc = DoclingDocument.model_validate_json(
+                json_path.read_text(encoding="utf-8")
+            )
+            markdown_content = md_path.read_text(encoding="utf-8")
+        except Exception as e:
+            print(f"⚠️ Could not reload cached conversion from {doc_dir}: {e}")
+            return None
+
+        return dl_doc, markdown_content, doc_dir
+
+    @staticmethod
+    def _folder_key(doc_dir: Path) -> Optional[str]:
+        try:
+            marker = json.loads((doc_dir / CACHE_MARKER_NAME).read_text(encoding="utf-8"))
+            return marker["cache_key"]
+        except Exception:
+            return None
+
+    def invalidate(self, doc_dir: Path) -> None:
+        """Mark `doc_dir` as no longer holding a cached conversion (it is being rewritten)."""
+        (Path(doc_dir) / CACHE_MARKER_NAME).unlink(missing_ok=True)
+
+    def store(self, key: str, doc_dir: Path) -> None:
+        """Record that `doc_dir` holds the outputs for `key`."""
+        (Path(doc_dir) / CACHE_MARKER_NAME).write_text(
+            json.dumps({"cache_key": key}), encoding="utf-8"
+        )
+        self._index[key] = {"doc_dir": str(doc_dir)}
+        self._save_index()
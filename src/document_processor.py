@@ -98,114 +98,394 @@
 Docling integration for processing uploaded documents.
 """
 
+import hashlib
+import json
+import mimetypes
 import os
-from typing import List, Any
+import shutil
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
-from pdf2image import convert_from_path
 import pytesseract
-import numpy as np
-from paddleocr import PaddleOCR
 
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions
+from docling_core.types.doc import BoundingBox, CoordOrigin, DocItemLabel, ProvenanceItem
 from langchain_core.documents import Document
 
+from src.conversion_cache import ConversionCache, fingerprint_options, hash_bytes, hash_file
+from src.metrics import enable_docling_profiling, get_metrics, record_docling_timings, span
+from src.model_registry import build_pipeline_options, get_converter, get_paddle_ocr
+from src.parallel_conversion import (
+    convert_files_parallel,
+    default_num_workers,
+    default_pages_per_split,
+)
+from src.streaming_ocr import StreamingOCR
+from src.structure_cache import STRUCTURE_DIR_NAME, StructureViews, precompute_structure_views
+from src.table_store import TableStore
+
 
 class DocumentProcessor:
-    def __init__(self, force_ocr: bool = False):
+    def __init__(
+        self,
+        force_ocr: bool = False,
+        num_workers: Optional[int] = None,
+        pages_per_split: Optional[int] = None,
+        output_root: str = "outputs",
+        table_store: Optional[TableStore] = None,
+    ):
         """
         Initialize the Docling DocumentConverter and output directory.
 
+        Args:
+            force_ocr: Run the OCR pipeline (and PaddleOCR fallback)
+            num_workers: Worker processes for conversion; defaults to
+                DOCLING_WORKERS (1 = convert in this process, one file at a time)
+            pages_per_split: In parallel mode, split PDFs longer than this many
+                pages into page ranges converted on separate workers; defaults to
+                DOCLING_PAGES_PER_SPLIT (0 = never split)
+            output_root: Folder receiving outputs/<file-stem>/ per document
+            table_store: Optional cross-document table store every processed
+                document's tables are added to
         """
         self.force_ocr = force_ocr
-
-        # Configure pipeline options for PDF processing
-        pipeline_options = PdfPipelineOptions(
-            do_ocr=self.force_ocr,   
-            do_table_structure=True,
-            generate_picture_images=True,
-            images_scale=2.0 if self.force_ocr else 1.0,
+        self.num_workers = num_workers or default_num_workers()
+        self.pages_per_split = (
+            default_pages_per_split() if pages_per_split is None else pages_per_split
         )
 
-        # Initialize converter with PDF options
-        self.converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(
-                    pipeline_options=pipeline_options
-                )
-            }
-        )
+        # Configure pipeline options for PDF processing
+        pipeline_options = build_pipeline_options(self.force_ocr)
+        self.options_fingerprint = fingerprint_options(pipeline_options)
+        # Outputs with OCR'd pages spliced in are cached under their own key
+        self.ocr_options_fingerprint = hashlib.sha256(
+            f"{self.options_fingerprint}|paddleocr-fallback".encode("utf-8")
+        ).hexdigest()
+
+        # Shared, process-wide converter (models are loaded once per process)
+        self.converter = get_converter(pipeline_options)
+        # Docling's own per-page / per-stage timings end up in the metrics
+        enable_docling_profiling()
         # Where we will store original files + markdown + json
-        self.output_root = Path("outputs")
-        self.output_root.mkdir(exist_ok=True)
+        self.output_root = Path(output_root)
+        self.output_root.mkdir(parents=True, exist_ok=True)
+
+        # Content-addressed cache: same bytes + same options → reuse outputs
+        self.conversion_cache = ConversionCache(self.output_root)
+        self.table_store = table_store
 
-        # Initialize PaddleOCR only when we may need aggressive OCR
+        # Use the shared PaddleOCR only when we may need aggressive OCR
         self.paddle_ocr = None
         if self.force_ocr:
-            print("🔧 Initializing PaddleOCR (this may take a bit on first run)...")
-            self.paddle_ocr = PaddleOCR(lang="en", use_angle_cls=True)
+            self.paddle_ocr = get_paddle_ocr()
 
         
     def _ocr_pdf_with_paddleocr(
         self,
         file_path: Path,
+        page_numbers: List[int],
         dpi: int = 200,
-        max_pages: int = 5,
-    ) -> str:
+    ) -> Dict[int, str]:
         """
-        Fallback OCR: render up to `max_pages` PDF pages to images and run PaddleOCR.
-        Returns concatenated text for the processed pages.
+        Fallback OCR: render only the given PDF pages to images and run PaddleOCR.
+
+        Pages are rasterized lazily on a background thread and recognized in
+        batches, so memory stays bounded regardless of document length.
+        Returns {page_no: text} for the pages that produced text.
         """
         if self.paddle_ocr is None:
             # Lazy init in case force_ocr was toggled later
-            print("🔧 Lazy-initializing PaddleOCR...")
-            self.paddle_ocr = PaddleOCR(lang="en", use_angle_cls=True)
+            self.paddle_ocr = get_paddle_ocr()
 
         print(
             f"🔍 PaddleOCR fallback on {file_path} "
-            f"(dpi={dpi}, max_pages={max_pages}) ..."
+            f"(dpi={dpi}, pages={page_numbers}) ..."
         )
 
-        try:
-            pages = convert_from_path(
-                str(file_path),
-                dpi=dpi,
-                first_page=1,
-                last_page=max_pages,
+        with span("ocr.paddle", file=file_path.name, pages=len(page_numbers)):
+            page_texts = StreamingOCR(self.paddle_ocr, dpi=dpi).run(file_path, page_numbers)
+
+        total_chars = sum(len(t) for t in page_texts.values())
+        print(f"✅ PaddleOCR extracted {total_chars} characters from {len(page_texts)} page(s)")
+        return page_texts
+
+    @staticmethod
+    def find_low_text_pages(dl_doc: Any, min_chars: int = 20) -> List[int]:
+        """
+        Return the page numbers whose extracted text is shorter than `min_chars`.
+
+        Text from text items and table cells is attributed to pages via provenance.
+        """
+        pages = getattr(dl_doc, "pages", None) or {}
+        if not pages:
+            return []
+
+        chars_per_page: Dict[int, int] = {page_no: 0 for page_no in pages}
+        for item in getattr(dl_doc, "texts", []):
+            for prov in getattr(item, "prov", []):
+                chars_per_page[prov.page_no] = (
+                    chars_per_page.get(prov.page_no, 0) + len((item.text or "").strip())
+                )
+        for table in getattr(dl_doc, "tables", []):
+            cells = getattr(table.data, "table_cells", []) if table.data else []
+            cell_chars = sum(len((cell.text or "").strip()) for cell in cells)
+            for prov in getattr(table, "prov", []):
+                chars_per_page[prov.page_no] = chars_per_page.get(prov.page_no, 0) + cell_chars
+
+        return sorted(p for p, n in chars_per_page.items() if n < min_chars)
+
+    @staticmethod
+    def _splice_ocr_text(dl_doc: Any, page_texts: Dict[int, str]) -> None:
+        """
+        Add OCR text to the DoclingDocument as one full-page text item per page.
+
+        Each item is inserted in reading order, after the content of the
+        preceding pages, so it lands in the right section for chunking and
+        markdown export.
+        """
+        def top_level(item: Any) -> Any:
+            # Insert next to body-level nodes, never inside a list / table group
+            while item.parent is not None and item.parent.cref != dl_doc.body.self_ref:
+                item = item.parent.resolve(dl_doc)
+            return item
+
+        # One pass over the items: document position of the first and last
+        # item on each page
+        first_on_page: Dict[int, Tuple[int, Any]] = {}
+        last_on_page: Dict[int, Tuple[int, Any]] = {}
+        for position, (item, _) in enumerate(dl_doc.iterate_items()):
+            item_prov = getattr(item, "prov", None)
+            if not item_prov:
+                continue
+            item_page = item_prov[0].page_no
+            first_on_page.setdefault(item_page, (position, item))
+            last_on_page[item_page] = (position, item)
+
+        # Anchor per OCR'd page: the last item on an earlier page (insert
+        # after it), else the first item on a later page (insert before it)
+        pages_with_items = sorted(last_on_page)
+        anchors: Dict[int, Tuple[Any, bool]] = {}
+        for page_no in page_texts:
+            earlier = [last_on_page[q] for q in pages_with_items if q < page_no]
+            later = [first_on_page[q] for q in pages_with_items if q > page_no]
+            if earlier:
+                anchors[page_no] = (max(earlier, key=lambda entry: entry[0])[1], True)
+            elif later:
+                anchors[page_no] = (min(later, key=lambda entry: entry[0])[1], False)
+
+        # Pages sharing an anchor stay in page order: inserting after an
+        # anchor goes in descending page order, inserting before it ascending
+        after_pages = sorted((p for p in anchors if anchors[p][1]), reverse=True)
+        before_pages = sorted(p for p in anchors if not anchors[p][1])
+        for page_no in after_pages + before_pages + sorted(set(page_texts) - set(anchors)):
+            text = page_texts[page_no]
+            page = dl_doc.pages.get(page_no)
+            width = page.size.width if page is not None else 0.0
+            height = page.size.height if page is not None else 0.0
+            prov = ProvenanceItem(
+                page_no=page_no,
+                bbox=BoundingBox(
+                    l=0.0, t=height, r=width, b=0.0,
+                    coord_origin=CoordOrigin.BOTTOMLEFT,
+                ),
+                charspan=(0, len(text)),
             )
-        except Exception as e:
-            print(f"❌ pdf2image convert_from_path failed: {e}")
-            return ""
 
-        texts: List[str] = []
-        total_pages = len(pages)
-        print(f"📝 Rendering {total_pages} page(s) for OCR...")
+            if page_no in anchors:
+                anchor, after = anchors[page_no]
+                dl_doc.insert_text(
+                    sibling=top_level(anchor), label=DocItemLabel.TEXT, text=text, prov=prov, after=after
+                )
+            else:
+                dl_doc.add_text(label=DocItemLabel.TEXT, text=text, prov=prov)
+
+    def ocr_low_text_pages(
+        self,
+        documents: List[Document],
+        docling_docs: List[Any],
+        min_chars_per_page: int = 20,
+        dpi: int = 200,
+        min_low_text_ratio: Optional[float] = None,
+    ) -> tuple[List[Document], List[Any]]:
+        """
+        OCR only the pages that came out (nearly) empty and splice the text back.
+
+        Only (mostly) scanned documents are OCR'd: at least `min_low_text_ratio`
+        of their pages must be low-text, which defaults to OCR_MIN_LOW_TEXT_RATIO
+        (0.5). Ordinary documents with a blank or figure-only page are left
+        alone. Pages that were already OCR'd once (even with no result) are
+        remembered in `ocr_pages.json` and not retried. The OCR'd outputs are
+        cached under their own key, separate from the plain conversion.
+
+        Returns:
+            Tuple of (LangChain Documents, Docling Documents), updated in place
+        """
+        if min_low_text_ratio is None:
+            min_low_text_ratio = float(os.getenv("OCR_MIN_LOW_TEXT_RATIO", "0.5"))
+        dl_docs_by_source = {d["source"]: d["doc"] for d in docling_docs}
+
+        for doc in documents:
+            filename = doc.metadata["filename"]
+            dl_doc = dl_docs_by_source.get(doc.metadata["source"])
+            if dl_doc is None or Path(filename).suffix.lower() != ".pdf":
+                continue
+
+            doc_dir = Path(doc.metadata["output_dir"])
+            content_hash = doc.metadata.get("content_hash")
+            attempted_path = doc_dir / "ocr_pages.json"
+            attempted = set()
+            if attempted_path.exists():
+                record = json.loads(attempted_path.read_text(encoding="utf-8"))
+                if record.get("content_hash") == content_hash:
+                    attempted = set(record.get("pages", []))
+
+            all_low_text_pages = self.find_low_text_pages(dl_doc, min_chars_per_page)
+            num_pages = len(dl_doc.pages or {})
+            if not num_pages or len(all_low_text_pages) / num_pages < min_low_text_ratio:
+                continue
+            low_text_pages = [p for p in all_low_text_pages if p not in attempted]
+            if not low_text_pages:
+                continue
+
+            print(f"⚠️ {filename}: {len(low_text_pages)} low-text page(s), running OCR...")
+            page_texts = self._ocr_pdf_with_paddleocr(
+                doc_dir / filename, low_text_pages, dpi=dpi
+            )
+            attempted_path.write_text(
+                json.dumps({
+                    "content_hash": content_hash,
+                    "pages": sorted(attempted | set(low_text_pages)),
+                }),
+                encoding="utf-8",
+            )
+            if not page_texts:
+                print("❌ PaddleOCR fallback produced no text; keeping Docling output.")
+                continue
+
+            self._splice_ocr_text(dl_doc, page_texts)
+            doc.page_content = self._save_conversion(dl_doc, doc_dir / filename, doc_dir)
+            # The folder now holds the OCR'd result: cache it under the OCR key
+            # (which _make_job looks up first), not the plain conversion's key
+            self.conversion_cache.invalidate(doc_dir)
+            if (doc_dir / "document.json").exists() and content_hash:
+                self.conversion_cache.store(
+                    ConversionCache.make_key(content_hash, self.ocr_options_fingerprint), doc_dir
+                )
+
+        return documents, docling_docs
+
+    def _convert_file(self, original_path: Path) -> Any:
+        """Run Docling on one saved file and return the DoclingDocument."""
+        with span("conversion.file", file=original_path.name) as attrs:
+            result = self.converter.convert(str(original_path))
+            attrs["pages"] = len(result.pages)
+        record_docling_timings(result, file=original_path.name)
+        get_metrics().count("pages_converted", len(result.pages))
+        return result.document
+
+    def _convert_pending(self, pending: List[dict]) -> None:
+        """
+        Convert every cache miss, setting job["dl_doc"] (None on failure).
 
-        for i, page in enumerate(pages, start=1):
-            print(f"   🧠 PaddleOCR on page {i}/{total_pages} ...")
+        With more than one worker the files are spread over the shared
+        process pool; results always come back in upload order.
+        """
+        if self.num_workers > 1 and (len(pending) > 1 or self.pages_per_split > 0):
+            print(f"⚡ Converting {len(pending)} file(s) on {self.num_workers} workers...")
+            with span("conversion.parallel", files=len(pending), workers=self.num_workers):
+                dl_docs = convert_files_parallel(
+                    [job["original_path"] for job in pending],
+                    force_ocr=self.force_ocr,
+                    num_workers=self.num_workers,
+                    pages_per_split=self.pages_per_split,
+                )
+            get_metrics().count(
+                "pages_converted", sum(dl_doc.num_pages() for dl_doc in dl_docs if dl_doc is not None)
+            )
+            for job, dl_doc in zip(pending, dl_docs):
+                job["dl_doc"] = dl_doc
+            return
+
+        for job in pending:
             try:
-                img = np.array(page)  # pdf2image gives PIL.Image; convert to numpy
-                result = self.paddle_ocr.ocr(img, cls=True)
-
-                # result is a list; we take the first page's lines
-                page_lines = []
-                if result:
-                    for line in result[0]:
-                        text = line[1][0]
-                        if text:
-                            page_lines.append(text)
-
-                page_text = "\n".join(page_lines)
-                if page_text.strip():
-                    texts.append(page_text)
+                job["dl_doc"] = self._convert_file(job["original_path"])
             except Exception as e:
-                print(f"❌ PaddleOCR failed on page {i}: {e}")
+                print(f"❌ Error processing {job['filename']}: {str(e)}")
+                job["dl_doc"] = None
+
+    def _save_conversion(self, dl_doc: Any, original_path: Path, doc_dir: Path) -> str:
+        """
+        Write document.md / document.json for a converted document.
+
+        Returns:
+            The markdown content used for RAG
+        """
+        # Export to markdown and save as document.md
+        with span("export.markdown", file=original_path.name):
+            markdown_content = dl_doc.export_to_markdown()
+            (doc_dir / "document.md").write_text(markdown_content, encoding="utf-8")
+
+        # Try to export full schema as JSON (best-effort)
+        try:
+            # Docling docs are Pydantic models (v2 style)
+            with span("export.json", file=original_path.name):
+                json_str = dl_doc.model_dump_json(indent=2)
+                (doc_dir / "document.json").write_text(json_str, encoding="utf-8")
+        except Exception as e:
+            print(f"⚠️ Could not save JSON schema for {original_path.name}: {e}")
+            # Never leave a stale schema from an earlier run behind
+            (doc_dir / "document.json").unlink(missing_ok=True)
 
-        full_text = "\n\n".join(texts)
-        print(f"✅ PaddleOCR extracted {len(full_text)} characters")
-        return full_text
+        # Structure tab views (summary, hierarchy, tables, pictures), computed once
+        try:
+            with span("export.structure", file=original_path.name):
+                precompute_structure_views(dl_doc, doc_dir)
+        except Exception as e:
+            print(f"⚠️ Could not precompute structure views for {original_path.name}: {e}")
+            shutil.rmtree(doc_dir / STRUCTURE_DIR_NAME, ignore_errors=True)
+
+        return markdown_content
+
+    def _make_job(
+        self,
+        filename: str,
+        file_type: str,
+        original_path: Path,
+        content_hash: str,
+        source: Optional[str] = None,
+    ) -> dict:
+        """Describe one saved input file and look it up in the conversion cache."""
+        cache_key = ConversionCache.make_key(content_hash, self.options_fingerprint)
+        ocr_key = ConversionCache.make_key(content_hash, self.ocr_options_fingerprint)
+        return {
+            "filename": filename,
+            "source": source or filename,
+            "file_type": file_type,
+            "doc_dir": original_path.parent,
+            "original_path": original_path,
+            "content_hash": content_hash,
+            "cache_key": cache_key,
+            # Prefer the output with OCR'd pages spliced in, if there is one
+            "cached": self.conversion_cache.lookup(ocr_key) or self.conversion_cache.lookup(cache_key),
+        }
+
+    @staticmethod
+    def upload_source_key(filename: str, content_hash: str) -> str:
+        """
+        Source key of an upload: its name plus content hash, so different
+        files uploaded under the same name (e.g. from two sessions) never
+        replace each other's chunks.
+        """
+        return f"uploads/{content_hash[:16]}/{filename}"
 
+    def _doc_dir(self, filename: str, source: str) -> Path:
+        """
+        outputs/<file-stem>/, or outputs/<file-stem>-<hash>/ when the source
+        key is more than the bare file name.
+        """
+        stem = Path(filename).stem
+        if source == filename:
+            return self.output_root / stem
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:10]
+        return self.output_root / f"{stem}-{digest}"
 
     def process_uploaded_files(self, uploaded_files) -> tuple[List[Document], List[Any]]:
         """
@@ -217,69 +497,144 @@ class DocumentProcessor:
         Returns:
             Tuple of (LangChain Documents, Docling Documents)
         """
-        documents: List[Document] = []
-        docling_docs: List[Any] = []
-
+        # 1) Save every upload and check the conversion cache
+        jobs: List[dict] = []
         for uploaded_file in uploaded_files:
             filename = uploaded_file.name
             print(f"📄 Processing {filename}...")
 
-            # Create per-document output folder: outputs/<file-stem>/
-            doc_dir = self.output_root / Path(filename).stem
+            file_bytes = bytes(uploaded_file.getbuffer())
+            content_hash = hash_bytes(file_bytes)
+            source = self.upload_source_key(filename, content_hash)
+
+            # Create per-document output folder: outputs/<file-stem>-<hash>/
+            doc_dir = self._doc_dir(filename, source)
             doc_dir.mkdir(parents=True, exist_ok=True)
 
-            # 1) Save original uploaded file
+            # Save original uploaded file
             original_path = doc_dir / filename
             with open(original_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+                f.write(file_bytes)
+
+            jobs.append(
+                self._make_job(filename, uploaded_file.type, original_path, content_hash, source)
+            )
+
+        return self._process_jobs(jobs)
+
+    def process_paths(
+        self, paths: List[Path], sources: Optional[List[str]] = None
+    ) -> tuple[List[Document], List[Any]]:
+        """
+        Process files already on disk (headless ingestion).
+
+        Files are hashed and copied into their output folder in blocks, so
+        they are never held in memory whole.
+
+        Args:
+            paths: Files to process
+            sources: Unique key per file used as the "source" of its chunks
+                (e.g. its full path), so files with the same name in
+                different folders are kept apart; defaults to the file names
+
+        Returns:
+            Tuple of (LangChain Documents, Docling Documents)
+        """
+        jobs: List[dict] = []
+        for i, path in enumerate(paths):
+            path = Path(path)
+            source = sources[i] if sources else path.name
+            print(f"📄 Processing {path}...")
+
+            doc_dir = self._doc_dir(path.name, source)
+            doc_dir.mkdir(parents=True, exist_ok=True)
+            original_path = doc_dir / path.name
+            if path.resolve() != original_path.resolve():
+                shutil.copyfile(path, original_path)
+
+            file_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            jobs.append(
+                self._make_job(path.name, file_type, original_path, hash_file(original_path), source)
+            )
+
+        return self._process_jobs(jobs)
+
+    def _process_jobs(self, jobs: List[dict]) -> tuple[List[Document], List[Any]]:
+        """Convert the cache misses among `jobs`, then export and collect in order."""
+        documents: List[Document] = []
+        docling_docs: List[Any] = []
+
+        # 2) Convert only the cache misses
+        pending = [job for job in jobs if job["cached"] is None]
+        for job in pending:
+            # The folder is about to hold a different conversion
+            self.conversion_cache.invalidate(job["doc_dir"])
+        if pending:
+            self._convert_pending(pending)
+
+        # 3) Export and collect results in upload order
+        for job in jobs:
+            filename = job["filename"]
+            doc_dir = job["doc_dir"]
+            original_path = job["original_path"]
 
-            # 2) Process the document with Docling
             try:
-                result = self.converter.convert(str(original_path))
-                dl_doc = result.document
-
-                # 3) Export to markdown and save as document.md
-                markdown_content = dl_doc.export_to_markdown()
-
-                if self.force_ocr and len(markdown_content.strip()) < 50:
-                    print("⚠️ Docling markdown is very short; running PaddleOCR fallback...")
-                    ocr_text = self._ocr_pdf_with_paddleocr(
-                        original_path,
-                        dpi=200,
-                        max_pages=5,   # you can increase later if this works well
-                    )
-                    if ocr_text.strip():
-                        markdown_content = ocr_text
-                        (doc_dir / "ocr_document.txt").write_text(
-                            ocr_text, encoding="utf-8"
-                        )
-                    else:
-                        print("❌ PaddleOCR fallback produced no text; keeping Docling output.")
-
-                (doc_dir / "document.md").write_text(markdown_content, encoding="utf-8")
-
-                # 4) Try to export full schema as JSON (best-effort)
-                try:
-                    # Docling docs are Pydantic models (v2 style)
-                    json_str = dl_doc.model_dump_json(indent=2)
-                    (doc_dir / "document.json").write_text(json_str, encoding="utf-8")
-                except Exception as e:
-                    print(f"⚠️ Could not save JSON schema for {filename}: {e}")
-
-                # 5) Create LangChain document for RAG
+                if job["cached"] is not None:
+                    dl_doc, markdown_content, cached_dir = job["cached"]
+                    if cached_dir.resolve() != doc_dir.resolve():
+                        for name in ("document.md", "document.json"):
+                            shutil.copyfile(cached_dir / name, doc_dir / name)
+                        if (cached_dir / "ocr_pages.json").exists():
+                            shutil.copyfile(cached_dir / "ocr_pages.json", doc_dir / "ocr_pages.json")
+                        # Copy next to the target, then swap it in, so nothing
+                        # (exports, thumbnails, tables) from an earlier file
+                        # with the same name survives
+                        target = doc_dir / STRUCTURE_DIR_NAME
+                        tmp = target.with_name(STRUCTURE_DIR_NAME + ".tmp")
+                        shutil.rmtree(tmp, ignore_errors=True)
+                        if (cached_dir / STRUCTURE_DIR_NAME).is_dir():
+                            shutil.copytree(cached_dir / STRUCTURE_DIR_NAME, tmp)
+                        shutil.rmtree(target, ignore_errors=True)
+                        if tmp.is_dir():
+                            tmp.rename(target)
+                    print(f"♻️ Reusing cached conversion for {filename}")
+                else:
+                    dl_doc = job["dl_doc"]
+                    if dl_doc is None:
+                        continue
+                    markdown_content = self._save_conversion(dl_doc, original_path, doc_dir)
+                    if (doc_dir / "document.json").exists():
+                        self.conversion_cache.store(job["cache_key"], doc_dir)
+
+                # Create LangChain document for RAG
                 doc = Document(
                     page_content=markdown_content,
                     metadata={
                         "filename": filename,
-                        "file_type": uploaded_file.type,
-                        "source": filename,
+                        "file_type": job["file_type"],
+                        "source": job["source"],
                         "output_dir": str(doc_dir),
+                        "content_hash": job["content_hash"],
                     },
                 )
                 documents.append(doc)
 
-                # 6) Keep Docling document for structure visualizer
-                docling_docs.append({"filename": filename, "doc": dl_doc})
+                # Keep Docling document for structure visualizer
+                docling_docs.append({
+                    "filename": filename,
+                    "source": job["source"],
+                    "doc": dl_doc,
+                    "output_dir": str(doc_dir),
+                })
+
+                if self.table_store is not None:
+                    try:
+                        with span("export.table_store", file=filename) as attrs:
+                            attrs["tables"] = self.table_store.add_document(
+                                job["source"], job["content_hash"], StructureViews(doc_dir, dl_doc)
+                            )
+                    except Exception as e:
+                        print(f"⚠️ Could not add tables of {filename} to the table store: {e}")
 
                 print(f"✅ Successfully processed {filename}")
                 print(f"   → Original:   {original_path}")
@@ -0,0 +1,203 @@
+"""
+Local SQLite cache for chunk embeddings.
+
+Vectors are keyed by (embedding model, hash of whitespace-normalized text),
+so re-indexing a document only embeds the chunks whose text changed.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so reflowed but identical chunks share a cache entry."""
+    return " ".join(text.split())
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """Cache key for one text under one embedding model."""
+    payload = f"{model_name}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """Size-bounded (LRU) SQLite store of embedding vectors with hit/miss counters."""
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        """
+        Args:
+            path: SQLite file to use (parent folders are created)
+            max_entries: Entries kept before least-recently-used ones are evicted
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for `keys` (missing keys are simply absent)."""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            # SQLite limits bound parameters per statement; query in slices
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                        [time.time(), *batch],
+                    )
+            self._conn.commit()
+
+            hit_count = sum(1 for key in keys if key in found)
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """Store vectors and evict the least recently used entries over the limit."""
+        if not items:
+            return
+
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+        # Evict down to 90% of the limit so we don't evict on every insert
+        to_remove = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (to_remove,),
+        )
+        print(f"🧹 Embedding cache evicted {to_remove} least-recently-used entries")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain Embeddings wrapper that consults an EmbeddingCache first."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str):
+        """
+        Args:
+            embeddings: The underlying embedding model
+            cache: Shared embedding cache
+            model_name: Name used in cache keys (vectors never mix across models)
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, computing only the ones missing from the cache."""
+        keys = [cache_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Queries go straight to the model (they rarely repeat verbatim)."""
+        return self.embeddings.embed_query(text)
+
+
+_caches_lock = threading.Lock()
+_caches: Dict[str, EmbeddingCache] = {}
+
+
+def get_embedding_cache(
+    path: Optional[str] = None,
+    max_entries: Optional[int] = None,
+) -> Optional[EmbeddingCache]:
+    """
+    Return the process-wide cache for `path`, so counters and the SQLite
+    connection are shared by every VectorStoreManager.
+
+    Defaults come from EMBEDDING_CACHE_PATH (empty value disables the cache)
+    and EMBEDDING_CACHE_MAX_ENTRIES.
+    """
+    if path is None:
+        path = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache/embeddings.sqlite")
+    if not path:
+        return None
+    if max_entries is None:
+        try:
+            max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+        except ValueError:
+            max_entries = 200_000
+
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = EmbeddingCache(path, max_entries=max_entries)
+            _caches[path] = cache
+    return cache
@@ -0,0 +1,133 @@
+"""
+Process-wide, lazily loaded embedding and reranking models.
+
+sentence-transformers (and torch) are only imported the first time a
+model is actually needed, and each model is loaded once per process no
+matter how many VectorStoreManager instances or Streamlit sessions use it.
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+# sentence-transformers model_kwargs per inference backend
+EMBEDDING_BACKENDS: Dict[str, Dict[str, Any]] = {
+    "torch": {},
+    "onnx": {"backend": "onnx"},
+    # int8-quantized ONNX export shipped in the all-MiniLM-L6-v2 repo
+    "onnx-int8": {
+        "backend": "onnx",
+        "model_kwargs": {"file_name": "onnx/model_qint8_avx512_vnni.onnx"},
+    },
+}
+
+_lock = threading.Lock()
+_models: Dict[Tuple[str, str, int], Embeddings] = {}
+_cross_encoders: Dict[str, Any] = {}
+
+
+def get_embedding_model(
+    model_name: str,
+    backend: str = "torch",
+    batch_size: int = 64,
+    num_threads: Optional[int] = None,
+) -> Embeddings:
+    """
+    Return the shared HuggingFaceEmbeddings for (model, backend, batch size).
+
+    Args:
+        model_name: sentence-transformers model id
+        backend: "torch", "onnx" or "onnx-int8"
+        batch_size: Inference mini-batch size
+        num_threads: Intra-op CPU threads; for torch applied process-wide on
+            first load, for ONNX set on the model's onnxruntime session
+    """
+    key = (model_name, backend, batch_size)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model_kwargs = dict(EMBEDDING_BACKENDS[backend])
+            if num_threads:
+                # Must be set before the first inference call to take effect
+                os.environ["OMP_NUM_THREADS"] = str(num_threads)
+                if backend == "torch":
+                    import torch
+
+                    torch.set_num_threads(num_threads)
+                else:
+                    # onnxruntime's CPU provider ignores OMP_NUM_THREADS
+                    import onnxruntime
+
+                    session_options = onnxruntime.SessionOptions()
+                    session_options.intra_op_num_threads = num_threads
+                    model_kwargs["model_kwargs"] = {
+                        **model_kwargs.get("model_kwargs", {}),
+                        "session_options": session_options,
+                    }
+
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+
+            print(f"🔧 Loading embedding model {model_name} ({backend})...")
+            model = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs=model_kwargs,
+                encode_kwargs={"batch_size": batch_size},
+            )
+            _models[key] = model
+    return model
+
+
+def get_cross_encoder(model_name: str, max_length: int = 256) -> Any:
+    """Return the shared sentence-transformers CrossEncoder for `model_name`."""
+    model = _cross_encoders.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _cross_encoders.get(model_name)
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            print(f"🔧 Loading cross-encoder {model_name}...")
+            model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+            _cross_encoders[model_name] = model
+    return model
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings handle that resolves the shared model on first use."""
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        batch_size: int = 64,
+        num_threads: Optional[int] = None,
+    ):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"Unknown embedding backend '{backend}'. "
+                f"Choose one of: {', '.join(EMBEDDING_BACKENDS)}"
+            )
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+
+    @property
+    def model(self) -> Embeddings:
+        return get_embedding_model(
+            self.model_name, self.backend, self.batch_size, self.num_threads
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
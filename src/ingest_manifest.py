@@ -0,0 +1,72 @@
+"""
+Resumable job manifest for batch ingestion.
+
+Maps each input file's content hash to its ingestion status and timings,
+so an interrupted run skips everything that was already indexed.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+# Lifecycle of one file: pending → converted → indexed, or failed
+STATUS_PENDING = "pending"
+STATUS_CONVERTED = "converted"
+STATUS_INDEXED = "indexed"
+STATUS_FAILED = "failed"
+
+
+class IngestManifest:
+    """JSON file of {content_hash: {path, status, timings, error, updated_at}}."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"⚠️ Could not read ingest manifest {self.path}, starting fresh: {e}")
+
+    def status(self, content_hash: str) -> Optional[str]:
+        entry = self.entries.get(content_hash)
+        return entry["status"] if entry else None
+
+    def update(
+        self,
+        content_hash: str,
+        status: str,
+        path: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record a status change for one file (call save() to persist)."""
+        with self._lock:
+            entry = self.entries.setdefault(content_hash, {"timings": {}})
+            entry["status"] = status
+            if path is not None:
+                entry["path"] = path
+            if timings:
+                entry["timings"].update({k: round(v, 3) for k, v in timings.items()})
+            if error is not None:
+                entry["error"] = error
+            elif status != STATUS_FAILED:
+                entry.pop("error", None)
+            entry["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def save(self) -> None:
+        """Write atomically, so a crash mid-write never corrupts the manifest."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(self.entries, indent=2), encoding="utf-8")
+            tmp.replace(self.path)
+
+    def counts(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for entry in self.entries.values():
+            totals[entry["status"]] = totals.get(entry["status"], 0) + 1
+        return totals
@@ -0,0 +1,241 @@
+"""
+Compact in-process BM25 keyword index over chunk texts.
+
+Vector search is weak on exact identifiers (part numbers, bulletin codes
+like 6360_92_tib), so this index sits next to the Chroma collection and is
+fused with the vector results at query time.
+
+Postings are stored per term as two `array` buffers (chunk slot, term
+frequency) rather than Python lists of tuples, and are written to disk as
+flat CSR-style numpy arrays. Removed chunks are tombstoned and compacted
+away once they make up a large share of the index.
+"""
+import json
+import math
+import re
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_SUBTOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens. Compound codes such as `fa-10215` or `6360_92_tib`
+    are kept whole *and* split into their parts, so either form matches.
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        tokens.append(token)
+        parts = _SUBTOKEN_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class KeywordIndex:
+    """BM25 index keyed by chunk ID, with incremental add/remove and persistence."""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            path: Folder to persist to (None = in-memory only). Loaded if it exists.
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+
+        self._term_ids: Dict[str, int] = {}
+        self._postings_docs: List[array] = []   # term id -> chunk slots
+        self._postings_tfs: List[array] = []    # term id -> term frequencies
+        self._chunk_ids: List[str] = []          # slot -> chunk ID
+        self._slots: Dict[str, int] = {}         # chunk ID -> slot
+        self._doc_lens = array("i")
+        self._alive = bytearray()
+        self._alive_count = 0
+        self._total_len = 0
+
+        if self.path is not None and (self.path / "meta.json").exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return self._alive_count
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._slots
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def add(self, chunk_ids: List[str], texts: List[str]) -> None:
+        """Index chunks; re-adding an existing ID replaces it."""
+        existing = [cid for cid in chunk_ids if cid in self._slots]
+        if existing:
+            self.remove(existing)
+
+        for chunk_id, text in zip(chunk_ids, texts):
+            slot = len(self._chunk_ids)
+            self._chunk_ids.append(chunk_id)
+            self._slots[chunk_id] = slot
+
+            term_freqs: Dict[str, int] = {}
+            tokens = tokenize(text)
+            for token in tokens:
+                term_freqs[token] = term_freqs.get(token, 0) + 1
+
+            for term, tf in term_freqs.items():
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    term_id = len(self._postings_docs)
+                    self._term_ids[term] = term_id
+                    self._postings_docs.append(array("i"))
+                    self._postings_tfs.append(array("i"))
+                self._postings_docs[term_id].append(slot)
+                self._postings_tfs[term_id].append(tf)
+
+            self._doc_lens.append(len(tokens))
+            self._alive.append(1)
+            self._alive_count += 1
+            self._total_len += len(tokens)
+
+    def remove(self, chunk_ids: List[str]) -> None:
+        """Tombstone chunks; compacts when more than a third of slots are dead."""
+        for chunk_id in chunk_ids:
+            slot = self._slots.pop(chunk_id, None)
+            if slot is None or not self._alive[slot]:
+                continue
+            self._alive[slot] = 0
+            self._alive_count -= 1
+            self._total_len -= self._doc_lens[slot]
+
+        dead = len(self._chunk_ids) - self._alive_count
+        if dead and dead * 3 > len(self._chunk_ids):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop tombstoned slots and renumber the survivors."""
+        remap = array("i", [-1] * len(self._chunk_ids))
+        chunk_ids: List[str] = []
+        doc_lens = array("i")
+        for slot, chunk_id in enumerate(self._chunk_ids):
+            if self._alive[slot]:
+                remap[slot] = len(chunk_ids)
+                chunk_ids.append(chunk_id)
+                doc_lens.append(self._doc_lens[slot])
+
+        term_ids: Dict[str, int] = {}
+        postings_docs: List[array] = []
+        postings_tfs: List[array] = []
+        for term, term_id in self._term_ids.items():
+            new_docs, new_tfs = array("i"), array("i")
+            for slot, tf in zip(self._postings_docs[term_id], self._postings_tfs[term_id]):
+                if remap[slot] >= 0:
+                    new_docs.append(remap[slot])
+                    new_tfs.append(tf)
+            if new_docs:
+                term_ids[term] = len(postings_docs)
+                postings_docs.append(new_docs)
+                postings_tfs.append(new_tfs)
+
+        self._term_ids = term_ids
+        self._postings_docs = postings_docs
+        self._postings_tfs = postings_tfs
+        self._chunk_ids = chunk_ids
+        self._slots = {chunk_id: slot for slot, chunk_id in enumerate(chunk_ids)}
+        self._doc_lens = doc_lens
+        self._alive = bytearray([1]) * len(chunk_ids)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def search(self, query: str, k: int = 8) -> List[Tuple[str, float]]:
+        """Return the top-k (chunk ID, BM25 score) pairs for the query."""
+        if not self._alive_count:
+            return []
+
+        n_docs = self._alive_count
+        avg_len = self._total_len / n_docs if n_docs else 0.0
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            docs = self._postings_docs[term_id]
+            tfs = self._postings_tfs[term_id]
+            df = sum(1 for slot in docs if self._alive[slot])
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            for slot, tf in zip(docs, tfs):
+                if not self._alive[slot]:
+                    continue
+                norm = 1 - self.b + self.b * (self._doc_lens[slot] / avg_len if avg_len else 0)
+                score = idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                scores[slot] = scores.get(slot, 0.0) + score
+
+        top = sorted(scores.items(), key=lambda kv: -kv[1])[:k]
+        return [(self._chunk_ids[slot], score) for slot, score in top]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        """Write the index to `path` as CSR arrays + a small JSON header."""
+        if self.path is None:
+            return
+        if len(self._chunk_ids) != self._alive_count:
+            self._compact()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        terms = list(self._term_ids)
+        lengths = [len(self._postings_docs[self._term_ids[t]]) for t in terms]
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        docs = np.empty(int(offsets[-1]), dtype=np.int32)
+        tfs = np.empty(int(offsets[-1]), dtype=np.int32)
+        for i, term in enumerate(terms):
+            term_id = self._term_ids[term]
+            docs[offsets[i]:offsets[i + 1]] = self._postings_docs[term_id]
+            tfs[offsets[i]:offsets[i + 1]] = self._postings_tfs[term_id]
+
+        np.savez_compressed(
+            self.path / "postings.npz",
+            offsets=offsets,
+            docs=docs,
+            tfs=tfs,
+            doc_lens=np.frombuffer(self._doc_lens.tobytes(), dtype=np.int32),
+        )
+        tmp_path = self.path / "meta.json.tmp"
+        tmp_path.write_text(
+            json.dumps({"terms": terms, "chunk_ids": self._chunk_ids}), encoding="utf-8"
+        )
+        tmp_path.replace(self.path / "meta.json")
+
+    def _load(self) -> None:
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        arrays = np.load(self.path / "postings.npz")
+        offsets, docs, tfs = arrays["offsets"], arrays["docs"], arrays["tfs"]
+
+        self._term_ids = {term: i for i, term in enumerate(meta["terms"])}
+        self._postings_docs = [
+            array("i", docs[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(meta["terms"]))
+        ]
+        self._postings_tfs = [
+            array("i", tfs[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(meta["terms"]))
+        ]
+        self._chunk_ids = list(meta["chunk_ids"])
+        self._slots = {chunk_id: slot for slot, chunk_id in enumerate(self._chunk_ids)}
+        self._doc_lens = array("i", arrays["doc_lens"].astype(np.int32).tobytes())
+        self._alive = bytearray([1]) * len(self._chunk_ids)
+        self._alive_count = len(self._chunk_ids)
+        self._total_len = int(sum(self._doc_lens))
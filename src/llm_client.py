@@ -0,0 +1,304 @@
+"""
+Process-wide pooled HTTP clients and chat models for the LLM backend.
+
+Every agent built in this process shares one keep-alive connection pool
+per base URL (HTTP/2 when the `h2` package is installed), so TLS and
+connection setup are paid once instead of on every first token. On top
+of the pool:
+
+- at most `LLM_MAX_IN_FLIGHT` requests are sent at once; further callers
+  wait up to `LLM_QUEUE_TIMEOUT` seconds for a slot, then fail fast
+- identical non-streaming requests that are in flight at the same time
+  are sent once and the response is shared
+
+Point LLM_BASE_URL at any OpenAI-compatible server (e.g. a local mock)
+to run the app or the API without OpenRouter.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Recomputed by the client from the decoded body of a shared response
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _coalesce_key(request: httpx.Request) -> Optional[str]:
+    """Key of a request that may share its response, or None (e.g. streaming)."""
+    if request.method != "POST":
+        return None
+    body = request.content
+    try:
+        if json.loads(body).get("stream"):
+            return None
+    except (ValueError, AttributeError):
+        return None
+    return hashlib.sha256(str(request.url).encode("utf-8") + b"\n" + body).hexdigest()
+
+
+def _copy_response(request: httpx.Request, status_code: int, headers, content: bytes) -> httpx.Response:
+    return httpx.Response(
+        status_code,
+        headers=[(k, v) for k, v in headers.items() if k.lower() not in _HOP_HEADERS],
+        content=content,
+        request=request,
+    )
+
+
+class _SharedResult:
+    """Outcome of an in-flight request, awaited by identical followers."""
+
+    def __init__(self):
+        self.status_code = 0
+        self.headers = httpx.Headers()
+        self.content = b""
+        self.error: Optional[BaseException] = None
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Holds a concurrency slot until a streamed body is fully consumed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class PooledTransport(httpx.BaseTransport):
+    """HTTP transport with bounded concurrency and in-flight request coalescing."""
+
+    def __init__(self, max_in_flight: int, queue_timeout: float, **transport_kwargs):
+        self._inner = httpx.HTTPTransport(**transport_kwargs)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Tuple[threading.Event, _SharedResult]] = {}
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        if not self._slots.acquire(timeout=self._queue_timeout):
+            raise httpx.PoolTimeout("Too many concurrent LLM requests", request=request)
+        try:
+            response = self._inner.handle_request(request)
+        except BaseException:
+            self._slots.release()
+            raise
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, self._slots.release),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = _coalesce_key(request)
+        if key is None:
+            return self._send(request)
+
+        with self._lock:
+            entry = self._in_flight.get(key)
+            leader = entry is None
+            if leader:
+                entry = (threading.Event(), _SharedResult())
+                self._in_flight[key] = entry
+        done, result = entry
+
+        if not leader:
+            done.wait()
+            if result.error is not None:
+                raise result.error
+            return _copy_response(request, result.status_code, result.headers, result.content)
+
+        try:
+            response = self._send(request)
+            response.read()
+            result.status_code = response.status_code
+            result.headers = response.headers
+            result.content = response.content
+            return _copy_response(request, result.status_code, result.headers, result.content)
+        except BaseException as e:
+            result.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            done.set()
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class AsyncPooledTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of PooledTransport, for use from one event loop."""
+
+    def __init__(self, max_in_flight: int, queue_timeout: float, **transport_kwargs):
+        self._inner = httpx.AsyncHTTPTransport(**transport_kwargs)
+        self._slots = asyncio.BoundedSemaphore(max_in_flight)
+        self._queue_timeout = queue_timeout
+        self._in_flight: Dict[str, "asyncio.Future[_SharedResult]"] = {}
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self._queue_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout("Too many concurrent LLM requests", request=request)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            self._slots.release()
+            raise
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_AsyncReleasingStream(response.stream, self._slots.release),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _coalesce_key(request)
+        if key is None:
+            return await self._send(request)
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            # shield: a cancelled follower must not cancel the shared request
+            result = await asyncio.shield(pending)
+            return _copy_response(request, result.status_code, result.headers, result.content)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = pending
+        try:
+            response = await self._send(request)
+            await response.aread()
+            result = _SharedResult()
+            result.status_code = response.status_code
+            result.headers = response.headers
+            result.content = response.content
+            pending.set_result(result)
+            return _copy_response(request, result.status_code, result.headers, result.content)
+        except BaseException as e:
+            if pending.done():
+                pass
+            elif isinstance(e, asyncio.CancelledError):
+                pending.cancel()
+            else:
+                pending.set_exception(e)
+                # Mark retrieved so an unawaited failure is not logged
+                pending.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_lock = threading.Lock()
+_http_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+_chat_models: Dict[Tuple[str, str], ChatOpenAI] = {}
+
+
+def get_http_clients(base_url: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Return the shared (sync, async) keep-alive clients for `base_url`."""
+    with _lock:
+        clients = _http_clients.get(base_url)
+        if clients is None:
+            max_in_flight = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+            queue_timeout = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+            transport_kwargs = dict(
+                http2=_http2_available(),
+                limits=httpx.Limits(
+                    max_connections=max_in_flight,
+                    max_keepalive_connections=max_in_flight,
+                    keepalive_expiry=120,
+                ),
+                retries=1,
+            )
+            timeout = httpx.Timeout(120.0, connect=10.0)
+            clients = (
+                httpx.Client(
+                    transport=PooledTransport(max_in_flight, queue_timeout, **transport_kwargs),
+                    timeout=timeout,
+                ),
+                httpx.AsyncClient(
+                    transport=AsyncPooledTransport(max_in_flight, queue_timeout, **transport_kwargs),
+                    timeout=timeout,
+                ),
+            )
+            print(
+                f"🔌 LLM connection pool for {base_url} "
+                f"({'HTTP/2' if transport_kwargs['http2'] else 'HTTP/1.1'}, {max_in_flight} in flight)"
+            )
+            _http_clients[base_url] = clients
+    return clients
+
+
+def get_chat_model(model_name: str, base_url: Optional[str] = None, **kwargs: Any) -> ChatOpenAI:
+    """
+    Return the shared ChatOpenAI for (model, base URL), built on the pooled clients.
+
+    Args:
+        model_name: Model id as the backend expects it
+        base_url: OpenAI-compatible endpoint (default: LLM_BASE_URL or OpenRouter)
+        **kwargs: Extra ChatOpenAI settings, only used when the model is first built
+    """
+    base_url = base_url or os.getenv("LLM_BASE_URL") or DEFAULT_BASE_URL
+    key = (model_name, base_url)
+    model = _chat_models.get(key)
+    if model is not None:
+        return model
+
+    http_client, http_async_client = get_http_clients(base_url)
+    with _lock:
+        model = _chat_models.get(key)
+        if model is None:
+            model = ChatOpenAI(
+                model=model_name,
+                base_url=base_url,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                **kwargs,
+            )
+            _chat_models[key] = model
+    return model
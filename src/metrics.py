@@ -0,0 +1,265 @@
+"""
+Pipeline timing spans, exported as Prometheus metrics and a JSON trace.
+
+Usage:
+    with span("embedding.batch", chunks=len(batch)):
+        ...
+    record("llm.time_to_first_token", seconds)
+
+Every span is aggregated into a per-stage latency histogram and, when
+METRICS_TRACE_PATH is set, buffered and appended as one JSON line to the
+trace file, which is rotated once it grows past METRICS_TRACE_MAX_MB.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Latency histogram upper bounds, in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Thread-safe collection of stage timings and counters."""
+
+    def __init__(
+        self,
+        trace_path: Optional[str] = None,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        prefix: str = "docling_demo",
+        trace_max_bytes: int = 50 * 1024 * 1024,
+        trace_buffer_size: int = 256,
+    ):
+        """
+        Args:
+            trace_path: JSON-lines trace file (None = no trace)
+            buckets: Histogram bounds in seconds
+            prefix: Prometheus metric name prefix
+            trace_max_bytes: Size at which the trace is rotated to <trace>.1
+                (the previous .1 is dropped); 0 = never rotate
+            trace_buffer_size: Events held in memory before they are written
+        """
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.buckets = buckets
+        self.prefix = prefix
+        self.trace_max_bytes = trace_max_bytes
+        self.trace_buffer_size = trace_buffer_size
+        self._histograms: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._trace_buffer: List[str] = []
+        # Serializes file writes, which happen outside the metrics lock
+        self._trace_lock = threading.Lock()
+        if self.trace_path is not None:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+            atexit.register(self.flush_trace)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block as stage `name`.
+
+        Yields the attribute dict, so the block can attach results
+        (e.g. ``attrs["chunks"] = n``) before the span is recorded.
+        """
+        started_at = time.time()
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if error is not None:
+                attrs["error"] = error
+            self.record(name, time.perf_counter() - start, started_at=started_at, **attrs)
+
+    def record(self, name: str, seconds: float, started_at: Optional[float] = None, **attrs: Any) -> None:
+        """Record a duration measured elsewhere (e.g. Docling's own timings)."""
+        line = None
+        if self.trace_path is not None:
+            event = {
+                "name": name,
+                "start": started_at if started_at is not None else time.time() - seconds,
+                "duration_ms": round(seconds * 1000, 3),
+                "pid": os.getpid(),
+                "thread": threading.current_thread().name,
+                "attrs": attrs,
+            }
+            line = json.dumps(event, default=str) + "\n"
+
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+            if line is not None:
+                self._trace_buffer.append(line)
+                if len(self._trace_buffer) < self.trace_buffer_size:
+                    return
+        if line is not None:
+            self.flush_trace()
+
+    def flush_trace(self) -> None:
+        """Append the buffered trace events to the trace file, rotating it when full."""
+        if self.trace_path is None:
+            return
+        with self._trace_lock:
+            with self._lock:
+                lines, self._trace_buffer = self._trace_buffer, []
+            if not lines:
+                return
+            try:
+                if (
+                    self.trace_max_bytes
+                    and self.trace_path.exists()
+                    and self.trace_path.stat().st_size >= self.trace_max_bytes
+                ):
+                    self.trace_path.replace(self.trace_path.with_name(self.trace_path.name + ".1"))
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except OSError as e:
+                print(f"⚠️ Could not write metrics trace {self.trace_path}: {e}")
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increase counter `name` (e.g. pages converted, chunks embedded)."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-stage count / total / mean seconds, plus counters."""
+        with self._lock:
+            return {
+                "stages": {
+                    name: {
+                        "count": h.count,
+                        "total_s": round(h.total, 6),
+                        "mean_s": round(h.total / h.count, 6) if h.count else 0.0,
+                    }
+                    for name, h in sorted(self._histograms.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def export_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        stage_metric = f"{self.prefix}_stage_seconds"
+        lines: List[str] = [
+            f"# HELP {stage_metric} Duration of pipeline stages.",
+            f"# TYPE {stage_metric} histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(h.buckets, h.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{stage_metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{stage_metric}_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{stage_metric}_sum{{stage="{name}"}} {h.total:.6f}')
+                lines.append(f'{stage_metric}_count{{stage="{name}"}} {h.count}')
+
+            for name, value in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name.replace('.', '_')}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the exposition text to `path` (for node_exporter's textfile collector)."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(self.export_prometheus(), encoding="utf-8")
+        tmp.replace(target)
+
+
+_registry_lock = threading.Lock()
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Return the process-wide registry.
+
+    The trace is off unless METRICS_TRACE_PATH is set; it is rotated at
+    METRICS_TRACE_MAX_MB (default 50).
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(
+                trace_path=os.getenv("METRICS_TRACE_PATH") or None,
+                trace_max_bytes=int(float(os.getenv("METRICS_TRACE_MAX_MB", "50")) * 1024 * 1024),
+            )
+    return _registry
+
+
+def flush_prometheus() -> None:
+    """
+    Write out buffered trace events, and the metrics to METRICS_PROM_PATH
+    if set (e.g. for node_exporter).
+    """
+    get_metrics().flush_trace()
+    path = os.getenv("METRICS_PROM_PATH")
+    if path:
+        get_metrics().write_prometheus(path)
+
+
+def span(name: str, **attrs: Any):
+    """Shortcut for get_metrics().span(...)."""
+    return get_metrics().span(name, **attrs)
+
+
+def record(name: str, seconds: float, **attrs: Any) -> None:
+    """Shortcut for get_metrics().record(...)."""
+    get_metrics().record(name, seconds, **attrs)
+
+
+def enable_docling_profiling() -> None:
+    """Make Docling collect its per-page / per-stage timings on each conversion."""
+    from docling.datamodel.settings import settings
+
+    settings.debug.profile_pipeline_timings = True
+
+
+def record_docling_timings(conv_res: Any, **attrs: Any) -> None:
+    """
+    Turn a ConversionResult's profiling data into "conversion.<stage>" spans.
+
+    Page-scoped stages (layout, table structure, OCR, ...) produce one
+    observation per page, document-scoped ones a single observation.
+    """
+    for stage, item in (getattr(conv_res, "timings", None) or {}).items():
+        scope = getattr(getattr(item, "scope", None), "value", None)
+        for seconds in getattr(item, "times", []):
+            record(f"conversion.{stage}", seconds, scope=scope, **attrs)
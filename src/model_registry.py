@@ -0,0 +1,99 @@
+"""
+Process-wide registry for heavy models (Docling converters, PaddleOCR).
+
+Streamlit reruns the script on every interaction and every browser tab is a
+separate session, but all of them live in the same Python process. Keeping
+the models here means they are loaded once and shared by everyone.
+"""
+import threading
+from typing import Any, Dict
+
+from docling.document_converter import DocumentConverter, PdfFormatOption
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions
+
+from src.conversion_cache import fingerprint_options
+
+
+_lock = threading.Lock()
+_converters: Dict[str, DocumentConverter] = {}
+_paddle_ocrs: Dict[str, Any] = {}
+
+
+def build_pipeline_options(force_ocr: bool = False) -> PdfPipelineOptions:
+    """Return the PDF pipeline options used by the app."""
+    return PdfPipelineOptions(
+        do_ocr=force_ocr,
+        do_table_structure=True,
+        generate_picture_images=True,
+        images_scale=2.0 if force_ocr else 1.0,
+    )
+
+
+def get_converter(pipeline_options: PdfPipelineOptions) -> DocumentConverter:
+    """
+    Return the shared DocumentConverter for these pipeline options.
+
+    Converters are keyed by the options fingerprint, so the OCR and non-OCR
+    pipelines each get exactly one instance per process.
+    """
+    key = fingerprint_options(pipeline_options)
+    converter = _converters.get(key)
+    if converter is not None:
+        return converter
+
+    with _lock:
+        converter = _converters.get(key)
+        if converter is None:
+            print("🔧 Building Docling DocumentConverter...")
+            converter = DocumentConverter(
+                format_options={
+                    InputFormat.PDF: PdfFormatOption(
+                        pipeline_options=pipeline_options
+                    )
+                }
+            )
+            _converters[key] = converter
+    return converter
+
+
+def get_paddle_ocr(lang: str = "en") -> Any:
+    """Return the shared PaddleOCR instance for `lang`, loading it on first use."""
+    ocr = _paddle_ocrs.get(lang)
+    if ocr is not None:
+        return ocr
+
+    with _lock:
+        ocr = _paddle_ocrs.get(lang)
+        if ocr is None:
+            # Imported lazily: paddle is heavy and only needed for OCR fallback
+            from paddleocr import PaddleOCR
+
+            print("🔧 Initializing PaddleOCR (this may take a bit on first run)...")
+            ocr = PaddleOCR(lang=lang, use_angle_cls=True)
+            _paddle_ocrs[lang] = ocr
+    return ocr
+
+
+def warm_up(force_ocr: bool = False) -> None:
+    """
+    Load the layout and TableFormer models ahead of the first conversion.
+
+    Args:
+        force_ocr: Also warm the OCR pipeline and PaddleOCR
+    """
+    option_sets = [build_pipeline_options(False)]
+    if force_ocr:
+        option_sets.append(build_pipeline_options(True))
+
+    for pipeline_options in option_sets:
+        converter = get_converter(pipeline_options)
+        try:
+            converter.initialize_pipeline(InputFormat.PDF)
+        except Exception as e:
+            print(f"⚠️ Could not warm up Docling pipeline: {e}")
+
+    if force_ocr:
+        get_paddle_ocr()
+
+    print("✅ Models warmed up")
@@ -0,0 +1,169 @@
+"""
+Parallel Docling conversion on a bounded pool of worker processes.
+
+Each worker keeps its own warm DocumentConverter (via the model registry),
+so the layout and TableFormer models are loaded once per worker, not once
+per file. Large PDFs are split into page ranges that are converted
+independently and concatenated back in page order.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docling_core.types.doc import DoclingDocument
+
+
+PageRange = Tuple[int, int]
+
+_pool_lock = threading.Lock()
+_pools: Dict[Tuple[bool, int], ProcessPoolExecutor] = {}
+
+# Set in each worker process by `_init_worker`
+_worker_force_ocr = False
+
+
+def default_num_workers() -> int:
+    """Worker count from DOCLING_WORKERS, defaulting to 1 (sequential)."""
+    try:
+        return max(1, int(os.getenv("DOCLING_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+
+def default_pages_per_split() -> int:
+    """Page-range size from DOCLING_PAGES_PER_SPLIT, defaulting to 0 (never split)."""
+    try:
+        return max(0, int(os.getenv("DOCLING_PAGES_PER_SPLIT", "0")))
+    except ValueError:
+        return 0
+
+
+def _init_worker(force_ocr: bool) -> None:
+    """Load the converter once when a worker process starts."""
+    global _worker_force_ocr
+    _worker_force_ocr = force_ocr
+
+    from docling.datamodel.base_models import InputFormat
+    from src.model_registry import build_pipeline_options, get_converter
+
+    get_converter(build_pipeline_options(force_ocr)).initialize_pipeline(InputFormat.PDF)
+
+
+def _convert_in_worker(file_path: str, page_range: Optional[PageRange]) -> str:
+    """Convert one file (or one page range of it) and return the document JSON."""
+    from src.model_registry import build_pipeline_options, get_converter
+
+    converter = get_converter(build_pipeline_options(_worker_force_ocr))
+    if page_range is None:
+        result = converter.convert(file_path)
+    else:
+        result = converter.convert(file_path, page_range=page_range)
+    return result.document.model_dump_json()
+
+
+def get_process_pool(force_ocr: bool, num_workers: int) -> ProcessPoolExecutor:
+    """Return the long-lived worker pool for this OCR mode and size."""
+    key = (force_ocr, num_workers)
+    with _pool_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            print(f"🔧 Starting {num_workers} Docling worker process(es)...")
+            pool = ProcessPoolExecutor(
+                max_workers=num_workers,
+                # spawn: forking a process that already runs Streamlit/torch threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(force_ocr,),
+            )
+            _pools[key] = pool
+    return pool
+
+
+def count_pdf_pages(file_path: Path) -> int:
+    """Return the page count of a PDF, or 0 if it cannot be read."""
+    try:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(str(file_path))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    except Exception as e:
+        print(f"⚠️ Could not count pages of {file_path.name}: {e}")
+        return 0
+
+
+def split_page_ranges(file_path: Path, pages_per_split: int) -> List[Optional[PageRange]]:
+    """
+    Split a PDF into 1-based inclusive page ranges of at most `pages_per_split` pages.
+
+    Returns [None] (convert the whole file) for non-PDFs, small PDFs, or when
+    the installed docling-core cannot concatenate documents.
+    """
+    if pages_per_split <= 0 or file_path.suffix.lower() != ".pdf":
+        return [None]
+    if not hasattr(DoclingDocument, "concatenate"):
+        return [None]
+
+    num_pages = count_pdf_pages(file_path)
+    if num_pages <= pages_per_split:
+        return [None]
+
+    return [
+        (start, min(start + pages_per_split - 1, num_pages))
+        for start in range(1, num_pages + 1, pages_per_split)
+    ]
+
+
+def convert_files_parallel(
+    file_paths: List[Path],
+    force_ocr: bool = False,
+    num_workers: int = 2,
+    pages_per_split: int = 0,
+) -> List[Optional[DoclingDocument]]:
+    """
+    Convert files on the worker pool.
+
+    Args:
+        file_paths: Files to convert
+        force_ocr: Use the OCR pipeline
+        num_workers: Size of the worker pool
+        pages_per_split: Split PDFs longer than this into page ranges (0 = never)
+
+    Returns:
+        One DoclingDocument per input path, in input order (None on failure)
+    """
+    pool = get_process_pool(force_ocr, num_workers)
+
+    futures: Dict[Tuple[int, int], Future] = {}
+    for file_idx, file_path in enumerate(file_paths):
+        for part_idx, page_range in enumerate(split_page_ranges(file_path, pages_per_split)):
+            futures[(file_idx, part_idx)] = pool.submit(
+                _convert_in_worker, str(file_path), page_range
+            )
+
+    results: List[Optional[DoclingDocument]] = []
+    for file_idx, file_path in enumerate(file_paths):
+        part_keys = sorted(k for k in futures if k[0] == file_idx)
+        parts: List[DoclingDocument] = []
+        try:
+            for key in part_keys:
+                parts.append(DoclingDocument.model_validate_json(futures[key].result()))
+        except Exception as e:
+            print(f"❌ Error processing {file_path.name}: {e}")
+            results.append(None)
+            continue
+
+        if len(parts) == 1:
+            results.append(parts[0])
+        else:
+            print(f"🧩 Merging {len(parts)} page ranges of {file_path.name}")
+            merged = DoclingDocument.concatenate(docs=parts)
+            merged.name = parts[0].name
+            results.append(merged)
+
+    return results
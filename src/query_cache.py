@@ -0,0 +1,162 @@
+"""
+Two-level query cache shared by every session in the process.
+
+Level 1 caches the search tool's packed context by
+(index version, normalized query). Level 2 caches final answers and
+matches new questions by embedding similarity, so a rephrased repeat of
+an earlier question is answered without running the agent. Both levels
+use TTL + LRU eviction, and every entry is tied to the index version it
+was computed against, so re-indexing invalidates them.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace/trailing punctuation."""
+    return " ".join(query.lower().split()).rstrip(" ?!.")
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries also expire after `ttl_seconds`."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Live (non-expired) entries, oldest first."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value) for key, (stored_at, value) in self._data.items()
+                if now - stored_at <= self.ttl_seconds
+            ]
+
+    def touch(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+
+    def discard_where(self, predicate) -> None:
+        """Remove every entry whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class QueryCache:
+    """Retrieval-result cache (exact) + answer cache (semantic near-duplicates)."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+    ):
+        """
+        Args:
+            similarity_threshold: Min cosine similarity for an answer-cache hit
+            max_entries: LRU size of each level
+            ttl_seconds: Entry lifetime
+        """
+        self.similarity_threshold = similarity_threshold
+        self.retrievals = TTLCache(max_entries, ttl_seconds)
+        self.answers = TTLCache(max_entries, ttl_seconds)
+
+    def drop_version(self, index_version: str) -> None:
+        """Invalidate everything computed against an index version that changed."""
+        self.retrievals.discard_where(lambda key: key[0] == index_version)
+        self.answers.discard_where(lambda key: key[0] == index_version)
+
+    # Level 1 -----------------------------------------------------------
+    def get_retrieval(self, index_version: str, query: str) -> Optional[str]:
+        return self.retrievals.get((index_version, normalize_query(query)))
+
+    def put_retrieval(self, index_version: str, query: str, context: str) -> None:
+        self.retrievals.put((index_version, normalize_query(query)), context)
+
+    # Level 2 -----------------------------------------------------------
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
+
+    def get_answer(
+        self, index_version: str, query: str, query_embedding: List[float]
+    ) -> Optional[str]:
+        """Return a cached answer for the same or a near-identical question."""
+        normalized = normalize_query(query)
+        exact = self.answers.get((index_version, normalized))
+        if exact is not None:
+            return exact[1]
+
+        entries = [
+            (key, value) for key, value in self.answers.items() if key[0] == index_version
+        ]
+        if not entries:
+            return None
+
+        matrix = np.stack([value[0] for _, value in entries])
+        similarities = matrix @ self._unit(query_embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        key, (_, answer) = entries[best]
+        self.answers.touch(key)
+        return answer
+
+    def put_answer(
+        self, index_version: str, query: str, query_embedding: List[float], answer: str
+    ) -> None:
+        self.answers.put(
+            (index_version, normalize_query(query)),
+            (self._unit(query_embedding), answer),
+        )
+
+
+_shared_lock = threading.Lock()
+_shared: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """Return the process-wide QueryCache."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = QueryCache()
+    return _shared
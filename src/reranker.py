@@ -0,0 +1,126 @@
+"""
+Optional cross-encoder reranking of retrieved chunks, with a per-query latency cap.
+"""
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from src.embedding_models import get_cross_encoder
+
+
+class CrossEncoderReranker:
+    """
+    Reranks candidates with a small local cross-encoder on CPU.
+
+    The reranker keeps a running estimate of the cost per (query, chunk)
+    pair. When scoring all candidates would blow the latency budget it
+    scores fewer of them, and when not even `top_k` fit it skips itself
+    entirely so the caller falls back to the retriever's own order. Every
+    `probe_every` skips it scores just `top_k` pairs anyway, so the
+    estimate recovers once the machine is less loaded.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 16,
+        latency_budget_ms: float = 300.0,
+        max_length: int = 256,
+        probe_every: int = 20,
+    ):
+        """
+        Args:
+            model_name: sentence-transformers CrossEncoder model
+            batch_size: Pairs scored per forward pass
+            latency_budget_ms: Max time spent reranking one query
+            max_length: Token cap per (query, chunk) pair
+            probe_every: While skipping, re-measure on every n-th query
+        """
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.latency_budget_ms = latency_budget_ms
+        self.max_length = max_length
+        self.probe_every = max(1, probe_every)
+        # Exponential moving average of milliseconds per scored pair, shared
+        # by concurrent queries
+        self._lock = threading.Lock()
+        self._ms_per_pair: Optional[float] = None
+        self._skips = 0
+        # The first forward pass pays one-off setup costs, so it is not timed
+        self._warmed_up = False
+
+    def _update_estimate(self, elapsed_ms: float, pairs: int, probe: bool = False) -> None:
+        observed = elapsed_ms / pairs
+        with self._lock:
+            # A probe replaces the estimate that kept reranking switched off
+            if self._ms_per_pair is None or probe:
+                self._ms_per_pair = observed
+            else:
+                self._ms_per_pair = 0.7 * self._ms_per_pair + 0.3 * observed
+
+    def _affordable(self, candidates: int, top_k: int) -> Tuple[int, bool]:
+        """(Candidates to score for this query (0 = skip reranking), is a probe)."""
+        with self._lock:
+            if self._ms_per_pair is None:
+                return candidates, False
+            affordable = int(self.latency_budget_ms / self._ms_per_pair)
+            if affordable >= top_k:
+                self._skips = 0
+                return min(candidates, affordable), False
+            self._skips += 1
+            if self._skips >= self.probe_every:
+                # Re-measure on a small batch instead of skipping forever
+                self._skips = 0
+                return top_k, True
+            print(
+                f"⏭️ Skipping rerank: ~{self._ms_per_pair:.1f} ms/pair "
+                f"exceeds the {self.latency_budget_ms:.0f} ms budget"
+            )
+            return 0, False
+
+    def rerank(self, query: str, docs: List[Document], top_k: int = 3) -> Optional[List[Document]]:
+        """
+        Return the `top_k` best candidates, or None when reranking was skipped.
+        """
+        if len(docs) <= top_k:
+            return None
+
+        # Loading the model does not count against the per-query budget
+        model = get_cross_encoder(self.model_name, self.max_length)
+
+        affordable, probe = self._affordable(len(docs), top_k)
+        if not affordable:
+            return None
+        # Candidates are already in retriever order, so keep the best ones
+        candidates = docs[:affordable]
+
+        scores: List[float] = []
+        start = time.perf_counter()
+        timed_from, timed_pairs = start, 0
+        for batch_start in range(0, len(candidates), self.batch_size):
+            batch = candidates[batch_start:batch_start + self.batch_size]
+            pairs = [(query, doc.page_content) for doc in batch]
+            scores.extend(float(s) for s in model.predict(pairs, batch_size=self.batch_size))
+
+            now = time.perf_counter()
+            with self._lock:
+                warm_up, self._warmed_up = not self._warmed_up, True
+            if warm_up:
+                timed_from = now
+            else:
+                timed_pairs += len(batch)
+            elapsed_ms = (now - start) * 1000
+            if elapsed_ms > self.latency_budget_ms and batch_start + len(batch) < len(candidates):
+                # Out of time: pick the top-k among the candidates scored so far
+                print(f"⏱️ Rerank budget hit after {len(scores)}/{len(candidates)} candidates")
+                break
+
+        if timed_pairs:
+            self._update_estimate((time.perf_counter() - timed_from) * 1000, timed_pairs, probe)
+
+        if len(scores) < top_k:
+            return None
+        order = sorted(range(len(scores)), key=lambda i: -scores[i])
+        return [candidates[i] for i in order[:top_k]]
@@ -0,0 +1,73 @@
+"""
+Hybrid retrieval: Chroma vector search fused with BM25 via reciprocal-rank fusion.
+"""
+import hashlib
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from src.keyword_index import KeywordIndex
+
+
+def _doc_key(doc: Document) -> str:
+    """Stable identity of a retrieved chunk (the Chroma ID, set by langchain-chroma>=0.2)."""
+    doc_id = getattr(doc, "id", None)
+    if doc_id:
+        return doc_id
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class HybridRetriever:
+    """Runs vector and keyword search and merges them with reciprocal-rank fusion."""
+
+    def __init__(
+        self,
+        vectorstore,
+        keyword_index: Optional[KeywordIndex] = None,
+        fetch_k: int = 20,
+        rrf_k: int = 60,
+    ):
+        """
+        Args:
+            vectorstore: The Chroma vector store
+            keyword_index: BM25 index over the same chunk IDs (None = vector only)
+            fetch_k: Candidates fetched from each retriever before fusion
+            rrf_k: RRF damping constant (60 is the usual choice)
+        """
+        self.vectorstore = vectorstore
+        self.keyword_index = keyword_index
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+
+    def _fetch_by_ids(self, chunk_ids: List[str]) -> Dict[str, Document]:
+        if not chunk_ids:
+            return {}
+        result = self.vectorstore.get(ids=chunk_ids, include=["documents", "metadatas"])
+        return {
+            chunk_id: Document(id=chunk_id, page_content=text or "", metadata=metadata or {})
+            for chunk_id, text, metadata in zip(
+                result["ids"], result["documents"], result["metadatas"]
+            )
+        }
+
+    def search(self, query: str, k: int = 8) -> List[Document]:
+        """Return the top-k fused results."""
+        if self.keyword_index is None or not len(self.keyword_index):
+            return self.vectorstore.similarity_search(query, k=k)
+
+        fetch_k = max(k, self.fetch_k)
+        vector_docs = self.vectorstore.similarity_search(query, k=fetch_k)
+        keyword_hits = self.keyword_index.search(query, k=fetch_k)
+
+        scores: Dict[str, float] = {}
+        docs: Dict[str, Document] = {}
+        for rank, doc in enumerate(vector_docs):
+            key = _doc_key(doc)
+            docs[key] = doc
+            scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        for rank, (chunk_id, _score) in enumerate(keyword_hits):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        ranked = sorted(scores, key=lambda key: -scores[key])[:k]
+        docs.update(self._fetch_by_ids([key for key in ranked if key not in docs]))
+        return [docs[key] for key in ranked if key in docs]
@@ -0,0 +1,170 @@
+"""
+Streaming PDF rasterization + batched PaddleOCR recognition.
+
+Pages are rendered a small window at a time on a background thread and
+handed to the recognizer through a bounded queue, so at most
+`max_queued_pages + batch_size` page images are in memory at once and
+poppler rendering overlaps with OCR inference.
+"""
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+from pdf2image import convert_from_path
+
+
+_DONE = object()
+
+
+def _page_windows(page_numbers: List[int], window: int) -> Iterator[Tuple[int, int]]:
+    """Group sorted page numbers into consecutive (first, last) runs of at most `window` pages."""
+    pages = sorted(set(page_numbers))
+    start = prev = None
+    for page_no in pages:
+        if start is None:
+            start = prev = page_no
+        elif page_no == prev + 1 and page_no - start < window:
+            prev = page_no
+        else:
+            yield start, prev
+            start = prev = page_no
+    if start is not None:
+        yield start, prev
+
+
+class StreamingOCR:
+    """Runs PaddleOCR over selected PDF pages with bounded memory."""
+
+    def __init__(
+        self,
+        paddle_ocr: Any,
+        dpi: int = 200,
+        batch_size: int = 4,
+        render_window: int = 2,
+        max_queued_pages: int = 4,
+    ):
+        """
+        Args:
+            paddle_ocr: A (shared) PaddleOCR instance
+            dpi: Rasterization resolution
+            batch_size: Pages per PaddleOCR call
+            render_window: Consecutive pages rendered per poppler call
+            max_queued_pages: Rendered pages allowed to wait for recognition
+        """
+        self.paddle_ocr = paddle_ocr
+        self.dpi = dpi
+        self.batch_size = max(1, batch_size)
+        self.render_window = max(1, render_window)
+        self.max_queued_pages = max(1, max_queued_pages)
+
+    def _render_pages(
+        self,
+        file_path: Path,
+        page_numbers: List[int],
+        out_queue: "queue.Queue",
+        stop: threading.Event,
+    ) -> None:
+        """Producer: render pages window by window and push (page_no, image) items."""
+        try:
+            for first, last in _page_windows(page_numbers, self.render_window):
+                if stop.is_set():
+                    return
+                try:
+                    images = convert_from_path(
+                        str(file_path),
+                        dpi=self.dpi,
+                        first_page=first,
+                        last_page=last,
+                    )
+                except Exception as e:
+                    print(f"❌ pdf2image convert_from_path failed on pages {first}-{last}: {e}")
+                    continue
+
+                for page_no, image in zip(range(first, last + 1), images):
+                    # pdf2image gives PIL.Image; convert to numpy and drop the PIL copy
+                    out_queue.put((page_no, np.array(image)))
+                    image.close()
+                    if stop.is_set():
+                        return
+        finally:
+            out_queue.put(_DONE)
+
+    def _recognize_one(self, image: np.ndarray) -> str:
+        """PaddleOCR 2.x: one image per call."""
+        result = self.paddle_ocr.ocr(image, cls=True)
+
+        # result is a list; we take the first page's lines
+        page_lines = []
+        if result and result[0]:
+            for line in result[0]:
+                text = line[1][0]
+                if text:
+                    page_lines.append(text)
+        return "\n".join(page_lines)
+
+    def _recognize_batch(self, images: List[np.ndarray]) -> List[str]:
+        """Run OCR on a batch of page images, returning one text per image."""
+        if hasattr(self.paddle_ocr, "predict"):
+            # PaddleOCR 3.x accepts a list of images and batches internally
+            results = self.paddle_ocr.predict(images)
+            return ["\n".join(t for t in res["rec_texts"] if t) for res in results]
+        return [self._recognize_one(image) for image in images]
+
+    def _flush(self, batch: List[Tuple[int, np.ndarray]], page_texts: Dict[int, str]) -> None:
+        page_nos = [page_no for page_no, _ in batch]
+        print(f"   🧠 PaddleOCR on page(s) {page_nos} ...")
+        try:
+            texts = self._recognize_batch([image for _, image in batch])
+        except Exception as e:
+            print(f"❌ PaddleOCR failed on page(s) {page_nos}: {e}")
+            return
+        for page_no, text in zip(page_nos, texts):
+            if text.strip():
+                page_texts[page_no] = text
+
+    def run(self, file_path: Path, page_numbers: List[int]) -> Dict[int, str]:
+        """
+        OCR the given pages of a PDF.
+
+        Returns:
+            {page_no: text} for the pages that produced text
+        """
+        page_texts: Dict[int, str] = {}
+        if not page_numbers:
+            return page_texts
+
+        pages_queue: "queue.Queue" = queue.Queue(maxsize=self.max_queued_pages)
+        stop = threading.Event()
+        renderer = threading.Thread(
+            target=self._render_pages,
+            args=(file_path, page_numbers, pages_queue, stop),
+            name="ocr-renderer",
+            daemon=True,
+        )
+        renderer.start()
+
+        batch: List[Tuple[int, np.ndarray]] = []
+        try:
+            while True:
+                item = pages_queue.get()
+                if item is _DONE:
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, page_texts)
+                    batch = []
+            if batch:
+                self._flush(batch, page_texts)
+        finally:
+            # Unblock the renderer if recognition bailed out early
+            stop.set()
+            while renderer.is_alive():
+                try:
+                    pages_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            renderer.join()
+
+        return page_texts
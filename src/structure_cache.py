@@ -0,0 +1,309 @@
+"""
+Precomputed structure views stored next to document.json.
+
+At ingestion time the summary, hierarchy, page overview, table frames
+and picture metadata of a document are written once to outputs/<stem>/structure/.
+The Document Structure tab then loads each view lazily, only when its tab
+needs it, instead of walking the DoclingDocument and re-exporting every
+table on each Streamlit rerun.
+"""
+import io
+import json
+import shutil
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.structure_visualizer import DocumentStructureVisualizer
+
+
+# Bump when the stored layout changes; older folders are recomputed
+STRUCTURE_VIEWS_VERSION = 2
+STRUCTURE_DIR_NAME = "structure"
+
+# Grouped table export formats: format -> (file suffix, MIME type)
+EXPORT_FORMATS = {
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".csv.zip", "application/zip"),
+    "parquet": (".parquet.zip", "application/zip"),
+}
+
+
+def clean_table_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Reset the index and give every column a unique, non-blank string name."""
+    df = df.reset_index(drop=True)
+
+    cleaned_cols = []
+    seen: Dict[str, int] = {}
+    for idx, col in enumerate(df.columns):
+        name = str(col).strip()
+
+        # Replace blank / NaN / None headers
+        if not name:
+            name = f"col_{idx+1}"
+
+        # Ensure uniqueness
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+
+        cleaned_cols.append(name)
+
+    df.columns = cleaned_cols
+    return df
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.write_text(json.dumps(data, indent=2, default=str), encoding="utf-8")
+
+
+def _write_frame(df: pd.DataFrame, path: Path) -> None:
+    try:
+        df.to_parquet(path, index=False)
+    except Exception:
+        # Mixed-type object columns: store the cell text as shown in the UI
+        df.astype(str).to_parquet(path, index=False)
+
+
+def precompute_structure_views(dl_doc: Any, doc_dir: Path) -> Path:
+    """
+    Compute every structure view of `dl_doc` and store it under doc_dir/structure/.
+
+    Returns:
+        The structure folder
+    """
+    target = Path(doc_dir) / STRUCTURE_DIR_NAME
+    tmp = target.with_name(STRUCTURE_DIR_NAME + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    (tmp / "tables").mkdir(parents=True)
+
+    visualizer = DocumentStructureVisualizer(dl_doc)
+    _write_json(tmp / "summary.json", visualizer.get_document_summary())
+    _write_json(tmp / "hierarchy.json", visualizer.get_document_hierarchy())
+    _write_json(tmp / "pages.json", visualizer.get_page_overview())
+
+    tables_meta: List[Dict[str, Any]] = []
+    for table in visualizer.get_tables_info():
+        meta = {
+            "table_number": table["table_number"],
+            "page": table["page"],
+            "caption": table["caption"],
+            "shape": list(table["shape"]),
+            "is_empty": table["is_empty"],
+            "file": None,
+        }
+        if not table["is_empty"]:
+            df = clean_table_columns(table["dataframe"])
+            file_name = f"table_{table['table_number']}.parquet"
+            _write_frame(df, tmp / "tables" / file_name)
+            meta["file"] = file_name
+            meta["columns"] = list(df.columns)
+        tables_meta.append(meta)
+    _write_json(tmp / "tables.json", tables_meta)
+
+    # Picture metadata only (straight from the index, no image decoding);
+    # image pixels stay in the DoclingDocument
+    pictures_meta = [
+        {k: v for k, v in picture.items() if k != "item"}
+        for picture in visualizer.index.pictures
+    ]
+    _write_json(tmp / "pictures.json", pictures_meta)
+    _write_json(tmp / "version.json", {"version": STRUCTURE_VIEWS_VERSION})
+
+    # Swap in atomically so readers never see a half-written folder
+    shutil.rmtree(target, ignore_errors=True)
+    tmp.rename(target)
+    return target
+
+
+class StructureViews:
+    """Lazily loaded, memoized structure views of one document."""
+
+    def __init__(self, doc_dir: Path, dl_doc: Optional[Any] = None):
+        """
+        Args:
+            doc_dir: The document's output folder (outputs/<stem>/)
+            dl_doc: DoclingDocument used to (re)build missing or outdated views
+        """
+        self.doc_dir = Path(doc_dir)
+        self.dl_doc = dl_doc
+        self.root = self.doc_dir / STRUCTURE_DIR_NAME
+        self._views: Dict[str, Any] = {}
+        self._frames: Dict[int, pd.DataFrame] = {}
+        self._lock = threading.RLock()
+
+    def _ensure_built(self) -> None:
+        version_file = self.root / "version.json"
+        try:
+            version = json.loads(version_file.read_text(encoding="utf-8"))["version"]
+        except Exception:
+            version = None
+        if version != STRUCTURE_VIEWS_VERSION:
+            if self.dl_doc is None:
+                raise FileNotFoundError(f"No structure views in {self.root}")
+            print(f"🧱 Building structure views for {self.doc_dir.name}...")
+            precompute_structure_views(self.dl_doc, self.doc_dir)
+
+    def _load(self, name: str) -> Any:
+        with self._lock:
+            if name not in self._views:
+                self._ensure_built()
+                self._views[name] = json.loads(
+                    (self.root / f"{name}.json").read_text(encoding="utf-8")
+                )
+            return self._views[name]
+
+    def summary(self) -> Dict[str, Any]:
+        return self._load("summary")
+
+    def hierarchy(self) -> List[Dict[str, Any]]:
+        """Heading tree: [{text, page, level, children: [...]}]."""
+        return self._load("hierarchy")
+
+    def pages(self) -> List[Dict[str, Any]]:
+        """Per-page headings, text count and table / picture numbers."""
+        return self._load("pages")
+
+    def tables(self) -> List[Dict[str, Any]]:
+        """Table metadata (number, page, caption, shape, columns), no frames."""
+        return self._load("tables")
+
+    def table_frame(self, table_number: int) -> Optional[pd.DataFrame]:
+        """The cleaned DataFrame of one table, read on first use."""
+        with self._lock:
+            if table_number not in self._frames:
+                meta = next(
+                    (t for t in self.tables() if t["table_number"] == table_number),
+                    None,
+                )
+                if meta is None or not meta["file"]:
+                    return None
+                self._frames[table_number] = pd.read_parquet(self.root / "tables" / meta["file"])
+            return self._frames[table_number]
+
+    def pictures(self) -> List[Dict[str, Any]]:
+        return self._load("pictures")
+
+    def schema_groups(self) -> List[Dict[str, Any]]:
+        """
+        Non-empty tables grouped by column set (case-insensitive), in document order.
+
+        Returns:
+            [{"columns": [...], "tables": [table metadata, ...]}, ...]
+        """
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for meta in self.tables():
+            if meta["is_empty"]:
+                continue
+            schema_key = tuple(col.lower() for col in meta["columns"])
+            groups.setdefault(
+                schema_key, {"columns": meta["columns"], "tables": []}
+            )["tables"].append(meta)
+        return list(groups.values())
+
+    def _grouped_frame(self, group: Dict[str, Any]) -> pd.DataFrame:
+        frames = []
+        for meta in group["tables"]:
+            df = self.table_frame(meta["table_number"]).copy()
+            # Add metadata so you know where each row came from
+            df.insert(0, "table_number", meta["table_number"])
+            df.insert(1, "page", meta["page"])
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True)
+
+    def grouped_export_path(self, fmt: str = "xlsx") -> Path:
+        """Where the grouped export in `fmt` lives (it may not be built yet)."""
+        suffix, _ = EXPORT_FORMATS[fmt]
+        return self.root / "exports" / f"{self.doc_dir.name}_tables_grouped{suffix}"
+
+    def grouped_export(self, fmt: str = "xlsx") -> Optional[Path]:
+        """
+        All tables grouped by similar columns, one sheet / file per group.
+
+        Built on first request and kept with the structure views, so it is
+        recomputed only when the document's views are.
+
+        Args:
+            fmt: "xlsx" (one sheet per group), "csv" or "parquet" (a zip
+                with one file per group, for tables too big for Excel)
+
+        Returns:
+            Path of the export file, or None if the document has no tables
+        """
+        path = self.grouped_export_path(fmt)
+        with self._lock:
+            self._ensure_built()
+            if path.exists():
+                return path
+            groups = self.schema_groups()
+            if not groups:
+                return None
+
+            print(f"📦 Building {fmt} table export for {self.doc_dir.name}...")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            # Sheet / file names: Type_1, Type_2... (Excel limit 31 chars)
+            if fmt == "xlsx":
+                with pd.ExcelWriter(tmp, engine="xlsxwriter") as writer:
+                    for i, group in enumerate(groups, start=1):
+                        self._grouped_frame(group).to_excel(
+                            writer, index=False, sheet_name=f"Type_{i}"[:31]
+                        )
+            elif fmt == "csv":
+                with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                    for i, group in enumerate(groups, start=1):
+                        with zf.open(f"Type_{i}.csv", "w") as raw:
+                            with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                                self._grouped_frame(group).to_csv(f, index=False)
+            else:
+                # Parquet is already compressed; store the files as they are
+                with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as zf:
+                    part = path.with_name(path.name + ".part")
+                    for i, group in enumerate(groups, start=1):
+                        _write_frame(self._grouped_frame(group), part)
+                        zf.write(part, f"Type_{i}.parquet")
+                    part.unlink(missing_ok=True)
+            tmp.replace(path)
+            return path
+
+    def full_image(self, picture_number: int) -> Optional[Any]:
+        """Full-resolution PIL image of one picture (from the DoclingDocument)."""
+        if self.dl_doc is None or not 0 < picture_number <= len(self.dl_doc.pictures):
+            return None
+        picture = self.dl_doc.pictures[picture_number - 1]
+        try:
+            if picture.image is not None:
+                return picture.image.pil_image
+        except Exception as e:
+            print(f"Warning: Could not extract image {picture_number}: {e}")
+        return None
+
+    def thumbnail(self, picture_number: int, max_size: int = 320) -> Optional[bytes]:
+        """JPEG thumbnail of one picture, rendered on first request and cached on disk."""
+        path = self.root / "thumbnails" / f"picture_{picture_number}_{max_size}.jpg"
+        if path.exists():
+            return path.read_bytes()
+
+        with self._lock:
+            self._ensure_built()
+            image = self.full_image(picture_number)
+            if image is None:
+                return None
+            thumb = image.copy()
+            thumb.thumbnail((max_size, max_size))
+            if thumb.mode not in ("RGB", "L"):
+                thumb = thumb.convert("RGB")
+            buffer = io.BytesIO()
+            thumb.save(buffer, format="JPEG", quality=80)
+            data = buffer.getvalue()
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            return data
@@ -1,12 +1,108 @@
 """
 Document structure visualization for Docling processed documents.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 import streamlit as st
 from docling_core.types.doc import DoclingDocument
 
 
+def _caption(item: Any, doc: DoclingDocument) -> Optional[str]:
+    """Caption text of a table/picture (caption_text is a method taking the doc)."""
+    caption_text = getattr(item, 'caption_text', None)
+    if not callable(caption_text):
+        return caption_text or None
+    try:
+        return caption_text(doc) or None
+    except Exception:
+        return None
+
+
+class DocumentIndex:
+    """
+    Compact per-document indexes built in a single traversal of a DoclingDocument.
+
+    Every text, table and picture item is visited exactly once; the
+    structure views are then answered from these indexes.
+    """
+
+    def __init__(self, doc: DoclingDocument):
+        self.name = doc.name
+        self.num_pages = len(doc.pages) if doc.pages else 0
+        self.num_texts = 0
+        # Text label → count
+        self.label_counts: Dict[str, int] = {}
+        # Title and section headers with their real nesting level (title = 0)
+        self.outline: List[Dict[str, Any]] = []
+        # Page number → [(kind, position in doc.texts / tables / pictures)]
+        self.page_items: Dict[Optional[int], List[Tuple[str, int]]] = {}
+        # {table_number, page, caption, item}
+        self.tables: List[Dict[str, Any]] = []
+        # {picture_number, page, caption, bbox, item}
+        self.pictures: List[Dict[str, Any]] = []
+
+        for kind, items in (("text", doc.texts), ("table", doc.tables), ("picture", doc.pictures)):
+            for position, item in enumerate(items or []):
+                prov = getattr(item, 'prov', None)
+                page_no = prov[0].page_no if prov else None
+                self.page_items.setdefault(page_no, []).append((kind, position))
+
+                if kind == "text":
+                    self.num_texts += 1
+                    label = getattr(item, 'label', None) or 'unknown'
+                    self.label_counts[label] = self.label_counts.get(label, 0) + 1
+                    if label == 'title':
+                        self.outline.append({'text': getattr(item, 'text', ''), 'page': page_no, 'level': 0})
+                    elif label == 'section_header':
+                        self.outline.append({
+                            'text': getattr(item, 'text', ''),
+                            'page': page_no,
+                            'level': getattr(item, 'level', 1) or 1,
+                        })
+                elif kind == "table":
+                    self.tables.append({
+                        'table_number': position + 1,
+                        'page': page_no,
+                        'caption': _caption(item, doc),
+                        'item': item,
+                    })
+                elif prov:
+                    # Pictures without provenance have no location to show
+                    bbox = prov[0].bbox
+                    self.pictures.append({
+                        'picture_number': position + 1,
+                        'page': page_no,
+                        'caption': _caption(item, doc),
+                        'bounding_box': {
+                            'left': bbox.l,
+                            'top': bbox.t,
+                            'right': bbox.r,
+                            'bottom': bbox.b
+                        } if bbox else None,
+                        'item': item,
+                    })
+
+    def heading_tree(self) -> List[Dict[str, Any]]:
+        """
+        Title and section headers nested by their level (title 0, then
+        SectionHeaderItem.level): [{text, page, level, children: [...]}].
+        """
+        roots: List[Dict[str, Any]] = []
+        stack: List[Dict[str, Any]] = []
+        for heading in self.outline:
+            node = {
+                'text': heading['text'],
+                'page': heading['page'],
+                'level': heading['level'],
+                'children': [],
+            }
+            while stack and stack[-1]['level'] >= node['level']:
+                stack.pop()
+            (stack[-1]['children'] if stack else roots).append(node)
+            stack.append(node)
+        return roots
+
+
 class DocumentStructureVisualizer:
     """Extracts and organizes document structure from Docling documents."""
 
@@ -18,48 +114,47 @@ class DocumentStructureVisualizer:
             docling_document: The DoclingDocument object from conversion
         """
         self.doc = docling_document
+        self._index: Optional[DocumentIndex] = None
+
+    @property
+    def index(self) -> DocumentIndex:
+        """The single-pass index, built on first use."""
+        if self._index is None:
+            self._index = DocumentIndex(self.doc)
+        return self._index
 
     def get_document_hierarchy(self) -> List[Dict[str, Any]]:
         """
-        Extract document hierarchy (headings and structure).
+        Extract document hierarchy (title and section headers).
 
         Returns:
-            List of dictionaries containing hierarchical structure info
+            Heading tree nested by real level: [{text, page, level, children}]
         """
-        hierarchy = []
-
-        if not hasattr(self.doc, 'texts') or not self.doc.texts:
-            return hierarchy
+        return self.index.heading_tree()
 
-        for item in self.doc.texts:
-            # Get label to identify item type
-            label = getattr(item, 'label', None)
-
-            # Focus on headers and titles
-            if label and 'header' in label.lower():
-                text = getattr(item, 'text', '')
-                prov = getattr(item, 'prov', [])
-                page_no = prov[0].page_no if prov else None
-
-                hierarchy.append({
-                    'type': label,
-                    'text': text,
-                    'page': page_no,
-                    'level': self._infer_heading_level(label)
-                })
-
-        return hierarchy
+    def get_page_overview(self) -> List[Dict[str, Any]]:
+        """
+        Summarize what each page holds.
 
-    def _infer_heading_level(self, label: str) -> int:
-        """Infer heading level from label."""
-        if 'title' in label.lower():
-            return 1
-        elif 'section' in label.lower():
-            return 2
-        elif 'subsection' in label.lower():
-            return 3
-        else:
-            return 4
+        Returns:
+            One dict per page with content, in page order:
+            {page, num_texts, headings, tables, pictures} (table / picture numbers)
+        """
+        pages = []
+        for page_no in sorted(p for p in self.index.page_items if p is not None):
+            page = {'page': page_no, 'num_texts': 0, 'headings': [], 'tables': [], 'pictures': []}
+            for kind, position in self.index.page_items[page_no]:
+                if kind == "text":
+                    page['num_texts'] += 1
+                    item = self.doc.texts[position]
+                    if getattr(item, 'label', None) in ('title', 'section_header'):
+                        page['headings'].append(getattr(item, 'text', ''))
+                elif kind == "table":
+                    page['tables'].append(position + 1)
+                else:
+                    page['pictures'].append(position + 1)
+            pages.append(page)
+        return pages
 
     def get_tables_info(self) -> List[Dict[str, Any]]:
         """
@@ -70,26 +165,15 @@ class DocumentStructureVisualizer:
         """
         tables_info = []
 
-        if not hasattr(self.doc, 'tables') or not self.doc.tables:
-            return tables_info
-
-        for i, table in enumerate(self.doc.tables, 1):
+        for table in self.index.tables:
             try:
                 # Export table to DataFrame
-                df = table.export_to_dataframe(doc=self.doc)
-
-                # Get provenance
-                prov = getattr(table, 'prov', [])
-                page_no = prov[0].page_no if prov else None
-
-                # Get caption if available
-                caption_text = getattr(table, 'caption_text', None)
-                caption = caption_text if caption_text and not callable(caption_text) else None
+                df = table['item'].export_to_dataframe(doc=self.doc)
 
                 tables_info.append({
-                    'table_number': i,
-                    'page': page_no,
-                    'caption': caption,
+                    'table_number': table['table_number'],
+                    'page': table['page'],
+                    'caption': table['caption'],
                     'dataframe': df,
                     'shape': df.shape,
                     'is_empty': df.empty
@@ -97,7 +181,7 @@ class DocumentStructureVisualizer:
 
             except Exception as e:
                 # Handle tables that can't be converted
-                print(f"Warning: Could not process table {i}: {e}")
+                print(f"Warning: Could not process table {table['table_number']}: {e}")
                 continue
 
         return tables_info
@@ -111,41 +195,24 @@ class DocumentStructureVisualizer:
         """
         pictures_info = []
 
-        if not hasattr(self.doc, 'pictures') or not self.doc.pictures:
-            return pictures_info
-
-        for i, pic in enumerate(self.doc.pictures, 1):
-            prov = getattr(pic, 'prov', [])
-
-            if prov:
-                page_no = prov[0].page_no
-                bbox = prov[0].bbox
-
-                # Get caption if available
-                caption_text = getattr(pic, 'caption_text', None)
-                caption = caption_text if caption_text and not callable(caption_text) else None
-
-                # Get PIL image if available
-                pil_image = None
-                try:
-                    if hasattr(pic, 'image') and pic.image is not None:
-                        if hasattr(pic.image, 'pil_image'):
-                            pil_image = pic.image.pil_image
-                except Exception as e:
-                    print(f"Warning: Could not extract image {i}: {e}")
-
-                pictures_info.append({
-                    'picture_number': i,
-                    'page': page_no,
-                    'caption': caption,
-                    'pil_image': pil_image,  # Add PIL image
-                    'bounding_box': {
-                        'left': bbox.l,
-                        'top': bbox.t,
-                        'right': bbox.r,
-                        'bottom': bbox.b
-                    } if bbox else None
-                })
+        for picture in self.index.pictures:
+            pic = picture['item']
+
+            # Get PIL image if available
+            pil_image = None
+            try:
+                if getattr(pic, 'image', None) is not None:
+                    pil_image = pic.image.pil_image
+            except Exception as e:
+                print(f"Warning: Could not extract image {picture['picture_number']}: {e}")
+
+            pictures_info.append({
+                'picture_number': picture['picture_number'],
+                'page': picture['page'],
+                'caption': picture['caption'],
+                'pil_image': pil_image,
+                'bounding_box': picture['bounding_box'],
+            })
 
         return pictures_info
 
@@ -156,28 +223,16 @@ class DocumentStructureVisualizer:
         Returns:
             Dictionary with document statistics
         """
-        pages = getattr(self.doc, 'pages', {})
-        texts = getattr(self.doc, 'texts', [])
-        tables = getattr(self.doc, 'tables', [])
-        pictures = getattr(self.doc, 'pictures', [])
-
-        # Count different text types
-        text_types = {}
-        for item in texts:
-            label = getattr(item, 'label', 'unknown')
-            text_types[label] = text_types.get(label, 0) + 1
-
+        index = self.index
         return {
-            'name': self.doc.name,
-            'num_pages': len(pages) if pages else 0,
-            'num_texts': len(texts),
-            'num_tables': len(tables),
-            'num_pictures': len(pictures),
-            'text_types': text_types
+            'name': index.name,
+            'num_pages': index.num_pages,
+            'num_texts': index.num_texts,
+            'num_tables': len(self.doc.tables or []),
+            'num_pictures': len(self.doc.pictures or []),
+            'text_types': dict(index.label_counts)
         }
 
-    
-    
     def export_full_structure(self) -> Dict[str, Any]:
         """
         Export complete document structure.
@@ -188,6 +243,7 @@ class DocumentStructureVisualizer:
         return {
             'summary': self.get_document_summary(),
             'hierarchy': self.get_document_hierarchy(),
+            'pages': self.get_page_overview(),
             'tables': self.get_tables_info(),
             'pictures': self.get_pictures_info()
-        }
\ No newline at end of file
+        }
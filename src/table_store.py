@@ -0,0 +1,289 @@
+"""
+Columnar store of every extracted table, indexed by normalized schema.
+
+At ingestion each document's tables are appended to table_store/ as
+Parquet files, one per (schema, document), and index.json maps every
+normalized column set to the tables that share it across all documents:
+
+    table_store/
+        index.json
+        schemas/<schema_id>/<document key>.parquet
+
+The agent's query_tables tool answers structured lookups ("torque value
+of part X across all manuals") from here, instead of vector-searching table
+markdown.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Optional, Set
+
+import pandas as pd
+
+from src.structure_cache import StructureViews
+
+
+# Bookkeeping columns stored with every row
+META_COLUMNS = ["_source", "_table_number", "_page"]
+
+
+def normalize_column(name: str) -> str:
+    """Lowercase and collapse punctuation / whitespace: "Torque (in-lb)" → "torque_in_lb"."""
+    return re.sub(r"[^0-9a-z]+", "_", str(name).lower()).strip("_")
+
+
+def normalize_columns(columns: List[str]) -> List[str]:
+    """Normalized, non-blank and unique column names, in order."""
+    normalized: List[str] = []
+    seen: Set[str] = set()
+    for idx, col in enumerate(columns):
+        name = normalize_column(col) or f"col_{idx+1}"
+        base, n = name, 0
+        while name in seen:
+            n += 1
+            name = f"{base}_{n}"
+        seen.add(name)
+        normalized.append(name)
+    return normalized
+
+
+def schema_id(columns: List[str]) -> str:
+    """Stable ID of a normalized column set."""
+    return hashlib.sha1("\x1f".join(columns).encode("utf-8")).hexdigest()[:12]
+
+
+def _document_key(source: str) -> str:
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+
+def _tokens(text: str) -> Set[str]:
+    return {t for t in re.split(r"[^0-9a-z]+", text.lower()) if len(t) > 1}
+
+
+class TableStore:
+    """Parquet table store with a schema → tables index across documents."""
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Store folder (created if missing)
+        """
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._lock = threading.RLock()
+        self._index: Dict[str, Any] = {"schemas": {}, "documents": {}}
+        self._index_mtime: Optional[float] = None
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Re-read index.json if another process (e.g. ingest.py) changed it."""
+        try:
+            mtime = self.index_path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._index_mtime:
+            return
+        try:
+            self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self._index_mtime = mtime
+        except Exception as e:
+            print(f"⚠️ Could not read table store index {self.index_path}: {e}")
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self._index, indent=2), encoding="utf-8")
+        tmp.replace(self.index_path)
+        self._index_mtime = self.index_path.stat().st_mtime
+
+    def _drop_document(self, source: str) -> None:
+        entry = self._index["documents"].pop(source, None)
+        if not entry:
+            return
+        key = _document_key(source)
+        for sid in entry["schemas"]:
+            (self.root / "schemas" / sid / f"{key}.parquet").unlink(missing_ok=True)
+            schema = self._index["schemas"].get(sid)
+            if schema is None:
+                continue
+            schema["tables"] = [t for t in schema["tables"] if t["source"] != source]
+            if not schema["tables"]:
+                del self._index["schemas"][sid]
+                shutil.rmtree(self.root / "schemas" / sid, ignore_errors=True)
+
+    def add_document(self, source: str, content_hash: str, views: StructureViews) -> int:
+        """
+        Store (or replace) all non-empty tables of one document.
+
+        Args:
+            source: Document name, as in the chunks' "source" metadata
+            content_hash: Hash of the file's bytes; unchanged documents are skipped
+            views: The document's structure views (cleaned table frames)
+
+        Returns:
+            Number of tables stored (0 when unchanged)
+        """
+        with self._lock:
+            self._refresh()
+            if self._index["documents"].get(source, {}).get("content_hash") == content_hash:
+                return 0
+            self._drop_document(source)
+
+            # Group the document's tables by normalized schema
+            by_schema: Dict[str, Dict[str, Any]] = {}
+            for meta in views.tables():
+                if meta["is_empty"]:
+                    continue
+                columns = normalize_columns(meta["columns"])
+                sid = schema_id(columns)
+                group = by_schema.setdefault(sid, {"columns": columns, "frames": [], "tables": []})
+
+                df = views.table_frame(meta["table_number"]).copy()
+                df.columns = columns
+                # Strings throughout, so parts from different documents share one schema
+                df = df.astype("string")
+                df.insert(0, "_source", source)
+                df.insert(1, "_table_number", meta["table_number"])
+                df.insert(2, "_page", meta["page"])
+                group["frames"].append(df)
+                group["tables"].append({
+                    "source": source,
+                    "table_number": meta["table_number"],
+                    "page": meta["page"],
+                    "caption": meta["caption"],
+                    "rows": len(df),
+                })
+
+            key = _document_key(source)
+            for sid, group in by_schema.items():
+                schema_dir = self.root / "schemas" / sid
+                schema_dir.mkdir(parents=True, exist_ok=True)
+                pd.concat(group["frames"], ignore_index=True).to_parquet(
+                    schema_dir / f"{key}.parquet", index=False
+                )
+                schema = self._index["schemas"].setdefault(
+                    sid, {"columns": group["columns"], "tables": []}
+                )
+                schema["tables"].extend(group["tables"])
+
+            self._index["documents"][source] = {
+                "content_hash": content_hash,
+                "schemas": list(by_schema),
+            }
+            self._save()
+            return sum(len(group["tables"]) for group in by_schema.values())
+
+    def remove_document(self, source: str) -> None:
+        with self._lock:
+            self._refresh()
+            self._drop_document(source)
+            self._save()
+
+    def schemas(self) -> Dict[str, Dict[str, Any]]:
+        """{schema_id: {"columns": [...], "tables": [{source, table_number, page, caption, rows}]}}"""
+        with self._lock:
+            self._refresh()
+            return self._index["schemas"]
+
+    def find_schemas(self, query: str, limit: int = 3) -> List[str]:
+        """Schema IDs whose column names (and table captions) best match `query`."""
+        query_tokens = _tokens(query)
+        scored = []
+        for sid, schema in self.schemas().items():
+            column_tokens = _tokens(" ".join(schema["columns"]))
+            caption_tokens = _tokens(" ".join(t["caption"] or "" for t in schema["tables"]))
+            # Column matches count double: they name the values being looked up
+            score = 2 * len(query_tokens & column_tokens) + len(query_tokens & caption_tokens)
+            if score:
+                scored.append((score, len(schema["tables"]), sid))
+        scored.sort(reverse=True)
+        return [sid for _, _, sid in scored[:limit]]
+
+    def matching_sources(self, source: str) -> List[str]:
+        """
+        Stored source keys that `source` refers to: the key itself or its
+        file name (CLI-ingested documents are keyed by full path, uploads
+        by uploads/<hash>/<name>).
+        """
+        with self._lock:
+            self._refresh()
+            return [
+                key for key in self._index["documents"]
+                if key == source or PurePosixPath(key).name == source
+            ]
+
+    def load(self, sid: str, source: Optional[str] = None) -> pd.DataFrame:
+        """All rows of one schema across documents (or from one document)."""
+        schema = self.schemas().get(sid)
+        if schema is None:
+            return pd.DataFrame(columns=META_COLUMNS)
+        schema_dir = self.root / "schemas" / sid
+        files = (
+            [schema_dir / f"{_document_key(key)}.parquet" for key in self.matching_sources(source)]
+            if source else sorted(schema_dir.glob("*.parquet"))
+        )
+        frames = [pd.read_parquet(f) for f in files if f.exists()]
+        if not frames:
+            return pd.DataFrame(columns=META_COLUMNS + schema["columns"])
+        return pd.concat(frames, ignore_index=True)
+
+    def query(
+        self,
+        columns_query: str,
+        contains: Optional[str] = None,
+        source: Optional[str] = None,
+        max_schemas: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rows of the best-matching schemas, optionally filtered.
+
+        Args:
+            columns_query: Words naming the columns / quantity looked up
+            contains: Keep only rows with a cell containing this text (case-insensitive)
+            source: Keep only rows from this document (stored key or file name)
+
+        Returns:
+            [{"schema_id", "columns", "tables", "rows": DataFrame}, ...]
+        """
+        results = []
+        for sid in self.find_schemas(columns_query, limit=max_schemas):
+            schema = self.schemas()[sid]
+            rows = self.load(sid, source=source)
+            if contains and not rows.empty:
+                needle = contains.lower()
+                value_cols = [c for c in rows.columns if c not in META_COLUMNS]
+                mask = rows[value_cols].apply(
+                    lambda col: col.str.lower().str.contains(needle, regex=False, na=False)
+                ).any(axis=1)
+                rows = rows[mask]
+            results.append({
+                "schema_id": sid,
+                "columns": schema["columns"],
+                "tables": len(schema["tables"]),
+                "rows": rows,
+            })
+        return results
+
+
+_shared_lock = threading.Lock()
+_shared: Dict[str, TableStore] = {}
+
+
+def get_table_store(path: Optional[str] = None) -> Optional[TableStore]:
+    """
+    Return the process-wide store for `path`.
+
+    Defaults to TABLE_STORE_DIR (empty value disables the store).
+    """
+    if path is None:
+        path = os.getenv("TABLE_STORE_DIR", "table_store")
+    if not path:
+        return None
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = TableStore(Path(path))
+        return _shared[path]
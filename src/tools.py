@@ -1,20 +1,57 @@
 """
 Agent tools for document search and retrieval.
 """
-from typing import Annotated
+from typing import Annotated, Optional
+
+import pandas as pd
 from langchain_core.tools import tool
 
+from src.context_packer import ContextPacker
+from src.keyword_index import KeywordIndex
+from src.metrics import span
+from src.query_cache import QueryCache
+from src.reranker import CrossEncoderReranker
+from src.retrieval import HybridRetriever
+from src.table_store import TableStore
+from src.vectorstore import SharedIndexState
+
 
-def create_search_tool(vectorstore):
+def create_search_tool(
+    vectorstore,
+    keyword_index: Optional[KeywordIndex] = None,
+    token_budget: int = 1500,
+    query_cache: Optional[QueryCache] = None,
+    index_version: Optional[str] = None,
+    reranker: Optional[CrossEncoderReranker] = None,
+    rerank_candidates: int = 50,
+    rerank_top_k: int = 3,
+    index_state: Optional[SharedIndexState] = None,
+):
     """
     Create a search tool that has access to the vector store.
 
     Args:
         vectorstore: The Chroma vector store containing documents
+        keyword_index: Optional BM25 index over the same chunks; when given,
+            keyword and vector results are merged with reciprocal-rank fusion
+        token_budget: Max tokens of context returned to the LLM per call
+        query_cache: Optional shared cache of packed results per (index version, query)
+        index_version: Version of the index the vector store holds (see
+            VectorStoreManager.index_version); required for caching
+        reranker: Optional cross-encoder; when given, `rerank_candidates` chunks
+            are retrieved and reranked down to `rerank_top_k`
+        rerank_candidates: Candidates over-fetched for reranking
+        rerank_top_k: Chunks kept after reranking
+        index_state: Shared state of a persistent index; when given, the
+            index version and keyword index are read from it on every call
+            (instead of `keyword_index` / `index_version`), so the tool
+            follows re-indexing done by other sessions or processes
 
     Returns:
         A tool function that can search the documents
     """
+    retriever = HybridRetriever(vectorstore, keyword_index)
+    packer = ContextPacker(token_budget=token_budget)
 
     @tool
     def search_documents(query: Annotated[str, "The search query or question about the documents"]) -> str:
@@ -24,28 +61,112 @@ def create_search_tool(vectorstore):
         Use this tool when you need to find specific information from the uploaded documents
         to answer user questions.
         """
+        search_retriever, version = retriever, index_version
+        if index_state is not None:
+            version, current_keyword_index = index_state.current()
+            search_retriever = HybridRetriever(vectorstore, current_keyword_index)
+
+        use_cache = query_cache is not None and version is not None
+        if use_cache:
+            cached = query_cache.get_retrieval(version, query)
+            if cached is not None:
+                return cached
+
         try:
-            # Perform similarity search
-            results = vectorstore.similarity_search(query, k=8)
+            # Perform hybrid (vector + keyword) search
+            if reranker is None:
+                with span("retrieval.search", k=8):
+                    results = search_retriever.search(query, k=8)
+            else:
+                with span("retrieval.search", k=rerank_candidates):
+                    results = search_retriever.search(query, k=rerank_candidates)
+                # Falls back to the top 8 in retrieval order when the rerank
+                # was skipped to stay within its latency budget
+                with span("retrieval.rerank", candidates=len(results)):
+                    results = reranker.rerank(query, results, top_k=rerank_top_k) or results[:8]
 
             if not results:
                 return "No relevant information found in the documents for this query."
 
-            # Format the results
-            context_parts = []
-            for i, doc in enumerate(results, 1):
-                source = doc.metadata.get('filename', doc.metadata.get('source', 'Unknown source'))
-                file_type = doc.metadata.get('file_type', '')
-                content = doc.page_content.strip()
+            # Deduplicate, trim to matching sentences and fit the token budget
+            with span("retrieval.pack", chunks=len(results)):
+                context = packer.pack(query, results)
+            if not context:
+                return "No relevant information found in the documents for this query."
+            if use_cache:
+                query_cache.put_retrieval(version, query, context)
+            return context
 
-                context_parts.append(
-                    f"[Source {i}: {source}]\n"
-                    f"Content: {content}\n"
-                )
+        except Exception as e:
+            return f"Error searching documents: {str(e)}"
 
-            return "\n---\n".join(context_parts)
+    return search_documents
+
+def create_table_query_tool(table_store: TableStore, max_rows: int = 20, max_cell_chars: int = 60):
+    """
+    Create a tool that looks up values in the stored tables of all documents.
+
+    Args:
+        table_store: The cross-document table store filled at ingestion
+        max_rows: Rows returned per matching table schema
+        max_cell_chars: Longer cell values are cut to this length
+
+    Returns:
+        A tool function that queries the tables
+    """
+
+    def _cell(value) -> str:
+        text = "" if pd.isna(value) else " ".join(str(value).split())
+        text = text.replace("|", "/")
+        return text if len(text) <= max_cell_chars else text[: max_cell_chars - 1] + "…"
+
+    @tool
+    def query_tables(
+        columns: Annotated[str, "Words naming the table columns or quantity you need, e.g. 'part number torque' or 'test equipment setting'"],
+        contains: Annotated[Optional[str], "Only rows with a cell containing this text, e.g. a part number or test point"] = None,
+        source: Annotated[Optional[str], "Only tables from this document: its file name or stored source key"] = None,
+    ) -> str:
+        """
+        Look up structured values in the tables extracted from all documents.
+
+        Tables with the same columns are stored together across documents, so
+        one call returns, e.g., a value for every manual at once. Prefer this
+        over search_documents for numbers and other values held in tables.
+        """
+        try:
+            with span("retrieval.tables") as attrs:
+                results = table_store.query(columns, contains=contains, source=source)
+                attrs["schemas"] = len(results)
+
+            if not results:
+                known = sorted(
+                    table_store.schemas().values(), key=lambda s: len(s["tables"]), reverse=True
+                )[:5]
+                if not known:
+                    return "No tables have been stored for the documents."
+                hint = "; ".join(", ".join(s["columns"]) for s in known)
+                return f"No table columns match '{columns}'. Most common table columns: {hint}"
+
+            sections = []
+            for result in results:
+                rows = result["rows"]
+                value_cols = result["columns"]
+                lines = [
+                    f"Columns: {', '.join(value_cols)} "
+                    f"({result['tables']} table(s), {len(rows)} matching row(s))",
+                    "| source | page | " + " | ".join(value_cols) + " |",
+                    "|" + " --- |" * (len(value_cols) + 2),
+                ]
+                for _, row in rows.head(max_rows).iterrows():
+                    cells = [_cell(row["_source"]), _cell(row["_page"])]
+                    cells += [_cell(row[col]) for col in value_cols]
+                    lines.append("| " + " | ".join(cells) + " |")
+                if len(rows) > max_rows:
+                    lines.append(f"... {len(rows) - max_rows} more row(s); narrow with 'contains' or 'source'.")
+                sections.append("\n".join(lines))
+            return "\n\n".join(sections)
 
         except Exception as e:
-            return f"Error searching documents: {str(e)}"
+            return f"Error querying tables: {str(e)}"
 
-    return search_documents
\ No newline at end of file
+    return query_tables
@@ -134,41 +134,138 @@
 """
 Vector store management for document storage and retrieval.
 """
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
 import os
+import threading
+from pathlib import Path
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings 
+
+from src.chunking import StructureChunker
+from src.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.embedding_models import LazyEmbeddings
+from src.keyword_index import KeywordIndex
+from src.metrics import get_metrics, span
+from src.query_cache import get_query_cache
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Written next to the Chroma files whenever the persistent collection changes
+INDEX_VERSION_FILE = "index_version.txt"
+
+ProgressCallback = Callable[[int, int], None]
+
 
 class VectorStoreManager:
     """Manages document chunking, embedding, and vector storage."""
 
-    def __init__(self):
-        """Initialize the vector store manager."""
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+    def __init__(
+        self,
+        persist_directory: Optional[str] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embed_batch_size: int = 64,
+        num_threads: Optional[int] = None,
+        backend: str = "torch",
+        chunk_max_tokens: int = 400,
+    ):
+        """
+        Initialize the vector store manager.
+
+        Args:
+            persist_directory: Folder for a persistent Chroma index. When None,
+                every indexing run builds a fresh in-memory collection.
+            embedding_cache: Optional cache of chunk vectors; only chunks whose
+                normalized text is not cached for this model get embedded.
+            embed_batch_size: Chunks embedded (and written to Chroma) per batch
+            num_threads: Intra-op CPU threads for inference (None = library default)
+            backend: "torch", "onnx" or "onnx-int8" (quantized CPU inference)
+            chunk_max_tokens: Token budget of structure-aware text chunks
+        """
+        self.persist_directory = persist_directory
+        self.embed_batch_size = max(1, embed_batch_size)
+
+        # Shared across managers/sessions; torch is only imported on first embed
+        self.embeddings = LazyEmbeddings(
+            EMBEDDING_MODEL_NAME,
+            backend=backend,
+            batch_size=self.embed_batch_size,
+            num_threads=num_threads,
         )
+        if embedding_cache is not None:
+            # Quantized/ONNX vectors differ slightly, so they get their own cache keys
+            cache_model_name = (
+                EMBEDDING_MODEL_NAME if backend == "torch"
+                else f"{EMBEDDING_MODEL_NAME}@{backend}"
+            )
+            self.embeddings = CachedEmbeddings(
+                self.embeddings, embedding_cache, cache_model_name
+            )
+        self.embedding_cache = embedding_cache
 
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=3000,
             chunk_overlap=200,
             length_function=len,
         )
-
-    def chunk_documents(self, documents: List[Document]) -> List[Document]:
+        self.structure_chunker = StructureChunker(max_tokens=chunk_max_tokens)
+
+        # BM25 index kept in sync with the collection by create_vectorstore()
+        self.keyword_index: Optional[KeywordIndex] = None
+        # Fingerprint of the collection contents, used to key query caches
+        self.index_version: Optional[str] = None
+
+    def chunk_documents(
+        self,
+        documents: List[Document],
+        docling_docs: Optional[List[Any]] = None,
+    ) -> List[Document]:
         """
         Split documents into smaller chunks for better retrieval.
+
+        Documents with a matching DoclingDocument in `docling_docs` are chunked
+        along their structure (sections, tables, pages); the rest fall back to
+        the character splitter over the markdown.
         """
         print(f"✂️ Chunking {len(documents)} documents...")
-        chunks = self.text_splitter.split_documents(documents)
+        dl_docs_by_source = {d["source"]: d["doc"] for d in docling_docs or []}
+
+        chunks: List[Document] = []
+        with span("chunking", documents=len(documents)) as attrs:
+            for document in documents:
+                dl_doc = dl_docs_by_source.get(document.metadata.get("source"))
+                structured: List[Document] = []
+                if dl_doc is not None:
+                    try:
+                        structured = self.structure_chunker.chunk(dl_doc, document.metadata)
+                    except Exception as e:
+                        print(f"⚠️ Structure chunking failed, using text splitter: {e}")
+                chunks.extend(structured or self.text_splitter.split_documents([document]))
+            attrs["chunks"] = len(chunks)
+
         print(f"✅ Created {len(chunks)} chunks")
         return chunks
 
-    def create_vectorstore(self, chunks: List[Document]) -> Chroma:
+    def create_vectorstore(
+        self,
+        chunks: List[Document],
+        progress_callback: Optional[ProgressCallback] = None,
+        replaced_sources: Optional[List[str]] = None,
+    ) -> Chroma:
         """
-        Create an in-memory Chroma vector store from document chunks.
+        Create a Chroma vector store from document chunks.
+
+        In-memory by default; with a persist_directory the on-disk index is
+        updated incrementally instead of rebuilt. Chunks are embedded and
+        written batch by batch; `progress_callback(done, total)` is called
+        after each batch.
+
+        Args:
+            replaced_sources: Persistent index only: sources superseded by
+                these chunks (e.g. an earlier upload of the same file), whose
+                chunks are all removed once the new ones are stored
         """
         print(f"🔢 Creating vector store with {len(chunks)} chunks...")
 
@@ -186,18 +283,214 @@ class VectorStoreManager:
                 "Try a clearer PDF or run OCR to convert it to searchable text first."
             )
 
+        if self.persist_directory:
+            return self._upsert_persistent(filtered_chunks, progress_callback, replaced_sources)
+
         try:
-            vectorstore = Chroma.from_documents(
-                documents=filtered_chunks,
-                embedding=self.embeddings,
+            vectorstore = Chroma(
                 collection_name="session_documents",  # in-memory only
+                embedding_function=self.embeddings,
             )
+            chunk_ids = self._chunk_ids(filtered_chunks)
+            self._embed_and_store(vectorstore, chunk_ids, filtered_chunks, progress_callback)
+
+            self.keyword_index = KeywordIndex()
+            self.keyword_index.add(chunk_ids, [c.page_content for c in filtered_chunks])
+            self.index_version = self.compute_index_version(vectorstore)
             print("✅ Vector store created successfully")
+            self._report_cache_stats()
             return vectorstore
         except Exception as e:
             print(f"❌ Error creating vector store: {str(e)}")
             raise
 
+    @staticmethod
+    def _clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Chroma only accepts str/int/float/bool metadata values."""
+        cleaned = {}
+        for key, value in metadata.items():
+            if value is None:
+                continue
+            cleaned[key] = value if isinstance(value, (str, int, float, bool)) else str(value)
+        return cleaned
+
+    def _embed_and_store(
+        self,
+        vectorstore: Chroma,
+        ids: List[str],
+        chunks: List[Document],
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> None:
+        """
+        Embed chunks in batches of `embed_batch_size` and upsert each batch as
+        soon as it is ready, instead of one monolithic embed-then-insert call.
+        """
+        total = len(chunks)
+        for start in range(0, total, self.embed_batch_size):
+            batch_ids = ids[start:start + self.embed_batch_size]
+            batch = chunks[start:start + self.embed_batch_size]
+            texts = [c.page_content for c in batch]
+
+            with span("embedding.batch", chunks=len(batch)):
+                vectors = self.embeddings.embed_documents(texts)
+            with span("vectorstore.insert", chunks=len(batch)):
+                vectorstore._collection.upsert(
+                    ids=batch_ids,
+                    embeddings=vectors,
+                    documents=texts,
+                    metadatas=[self._clean_metadata(c.metadata) for c in batch],
+                )
+            get_metrics().count("chunks_embedded", len(batch))
+
+            done = start + len(batch)
+            print(f"   🔄 Embedded {done}/{total} chunks")
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+    def _report_cache_stats(self) -> None:
+        if self.embedding_cache is None:
+            return
+        stats = self.embedding_cache.stats()
+        print(
+            f"   Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%}), {stats['entries']} entries"
+        )
+
+    @staticmethod
+    def _chunk_ids(chunks: List[Document]) -> List[str]:
+        """
+        Content-derived chunk IDs: same source + same text → same ID.
+
+        Repeated identical text inside one source gets an occurrence counter.
+        """
+        ids = []
+        seen: Dict[str, int] = {}
+        for chunk in chunks:
+            source = chunk.metadata.get("source", "")
+            base = hashlib.sha256(
+                f"{source}\x00{chunk.page_content}".encode("utf-8")
+            ).hexdigest()
+            occurrence = seen.get(base, 0)
+            seen[base] = occurrence + 1
+            ids.append(f"{base[:32]}-{occurrence}")
+        return ids
+
+    @staticmethod
+    def compute_index_version(vectorstore: Chroma) -> str:
+        """Hash of all chunk IDs in the collection; changes whenever chunks do."""
+        ids = sorted(vectorstore.get(include=[])["ids"])
+        return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()[:16]
+
+    def load_vectorstore(self) -> Chroma:
+        """Open the persistent Chroma collection (created empty if missing)."""
+        if not self.persist_directory:
+            raise ValueError("load_vectorstore() needs a persist_directory")
+        return Chroma(
+            collection_name="documents",
+            embedding_function=self.embeddings,
+            persist_directory=self.persist_directory,
+        )
+
+    def load_keyword_index(self) -> KeywordIndex:
+        """Open the persistent BM25 index stored next to the Chroma files."""
+        if not self.persist_directory:
+            raise ValueError("load_keyword_index() needs a persist_directory")
+        return KeywordIndex(path=os.path.join(self.persist_directory, "keyword_index"))
+
+    def shared_index_state(self) -> "SharedIndexState":
+        """
+        The process-wide version + BM25 state of the persistent index.
+
+        Published from the collection on first use if no run has written
+        its version file yet.
+        """
+        state = get_index_state(self.persist_directory)
+        if state.current()[0] is None:
+            vectorstore = self.load_vectorstore()
+            state.publish(self.compute_index_version(vectorstore), self.load_keyword_index())
+        return state
+
+    def _upsert_persistent(
+        self,
+        chunks: List[Document],
+        progress_callback: Optional[ProgressCallback] = None,
+        replaced_sources: Optional[List[str]] = None,
+    ) -> Chroma:
+        """
+        Bring the persistent collection in sync with `chunks`, per source file.
+
+        Only chunks whose ID is not stored yet are embedded; stored chunks of
+        the same source that no longer exist, and all chunks of
+        `replaced_sources`, are deleted. Sources that are not part of this run
+        are left untouched. Deletions only happen after every new chunk was
+        stored, so a failed run never loses the previous version.
+        """
+        try:
+            vectorstore = self.load_vectorstore()
+            keyword_index = self.load_keyword_index()
+
+            by_source: Dict[str, List[Document]] = {}
+            for chunk in chunks:
+                by_source.setdefault(chunk.metadata.get("source", ""), []).append(chunk)
+
+            # Work out what changed per source, then embed all new chunks together
+            new_ids: List[str] = []
+            new_chunks: List[Document] = []
+            stale_ids: List[str] = []
+            for source, source_chunks in by_source.items():
+                ids = self._chunk_ids(source_chunks)
+                existing = set(
+                    vectorstore.get(where={"source": source}, include=[])["ids"]
+                )
+
+                stale = existing - set(ids)
+                stale_ids.extend(stale)
+
+                added = 0
+                for chunk_id, chunk in zip(ids, source_chunks):
+                    if chunk_id not in existing:
+                        new_ids.append(chunk_id)
+                        new_chunks.append(chunk)
+                        added += 1
+                    elif chunk_id not in keyword_index:
+                        # Stored before the keyword index existed: index text only
+                        keyword_index.add([chunk_id], [chunk.page_content])
+
+                print(
+                    f"   {source}: {added} new, {len(stale)} removed, "
+                    f"{len(ids) - added} unchanged"
+                )
+
+            for source in replaced_sources or []:
+                if source in by_source:
+                    continue
+                replaced = vectorstore.get(where={"source": source}, include=[])["ids"]
+                stale_ids.extend(replaced)
+                print(f"   {source}: replaced, {len(replaced)} removed")
+
+            if new_chunks:
+                self._embed_and_store(vectorstore, new_ids, new_chunks, progress_callback)
+                keyword_index.add(new_ids, [c.page_content for c in new_chunks])
+            elif progress_callback is not None:
+                progress_callback(0, 0)
+
+            # Everything new is stored: only now drop what it replaces
+            if stale_ids:
+                vectorstore.delete(ids=stale_ids)
+                keyword_index.remove(stale_ids)
+
+            keyword_index.save()
+            self.keyword_index = keyword_index
+            self.index_version = self.compute_index_version(vectorstore)
+            get_index_state(self.persist_directory).publish(self.index_version, keyword_index)
+
+            print("✅ Persistent vector store updated")
+            self._report_cache_stats()
+            return vectorstore
+        except Exception as e:
+            print(f"❌ Error updating vector store: {str(e)}")
+            raise
+
     def search_similar(self, vectorstore: Chroma, query: str, k: int = 4) -> List[Document]:
         """
         Perform semantic similarity search.
@@ -207,3 +500,71 @@ class VectorStoreManager:
         except Exception as e:
             print(f"❌ Error searching vector store: {str(e)}")
             return []
+
+
+class SharedIndexState:
+    """
+    Current version and BM25 index of one persistent collection.
+
+    Every session and the API server search the same Chroma folder, so the
+    version that keys their query caches must not be captured when a tool is
+    built. Writers publish the new version to <persist dir>/index_version.txt;
+    current() re-reads it (one stat per call) and reloads the keyword index
+    when it changed, in this process or another (e.g. ingest.py). Cached
+    results of the replaced version are dropped from the shared query cache.
+    """
+
+    def __init__(self, persist_directory: str):
+        self.persist_directory = persist_directory
+        self.version_path = Path(persist_directory) / INDEX_VERSION_FILE
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._version: Optional[str] = None
+        self._keyword_index: Optional[KeywordIndex] = None
+
+    def _replace(self, index_version: str, keyword_index: KeywordIndex) -> None:
+        previous = self._version
+        self._version = index_version
+        self._keyword_index = keyword_index
+        if previous and previous != index_version:
+            get_query_cache().drop_version(previous)
+
+    def publish(self, index_version: str, keyword_index: KeywordIndex) -> None:
+        """Record a new version of the collection (after it was written)."""
+        with self._lock:
+            self.version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.version_path.with_suffix(".txt.tmp")
+            tmp.write_text(index_version, encoding="utf-8")
+            tmp.replace(self.version_path)
+            self._mtime = self.version_path.stat().st_mtime
+            self._replace(index_version, keyword_index)
+
+    def current(self) -> Tuple[Optional[str], Optional[KeywordIndex]]:
+        """(index version, keyword index) as of now; (None, None) before the first publish."""
+        with self._lock:
+            try:
+                mtime = self.version_path.stat().st_mtime
+            except FileNotFoundError:
+                return self._version, self._keyword_index
+            if mtime != self._mtime:
+                index_version = self.version_path.read_text(encoding="utf-8").strip()
+                if index_version != self._version:
+                    keyword_index = KeywordIndex(
+                        path=os.path.join(self.persist_directory, "keyword_index")
+                    )
+                    self._replace(index_version, keyword_index)
+                self._mtime = mtime
+            return self._version, self._keyword_index
+
+
+_shared_lock = threading.Lock()
+_shared: Dict[str, SharedIndexState] = {}
+
+
+def get_index_state(persist_directory: str) -> SharedIndexState:
+    """Return the process-wide state of the persistent index in `persist_directory`."""
+    key = os.path.abspath(persist_directory)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = SharedIndexState(persist_directory)
+        return _shared[key]